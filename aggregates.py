@@ -0,0 +1,268 @@
+import pandas as pd
+from utils import load_filtered, data_version
+from result_store import get_result_store, dataset_version
+
+WEEKDAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_ORDER = ['April', 'May', 'June']
+# Charts plot both customer types as columns, so slices missing one still get it
+CUSTOMER_TYPES = ['B2B', 'B2C']
+
+
+def sales_per_state(df):
+    """Orders, revenue, AOV and quantity per state, sorted by revenue"""
+    state_data = df.groupby('ship_state').agg({
+        'order_id': 'count',
+        'total_revenue': 'sum',
+        'amount': 'mean',
+        'Quantity': 'sum'
+    }).round(2)
+    state_data.columns = ['Total_Orders', 'Total_Revenue', 'Avg_Order_Value', 'Total_Quantity']
+    return state_data.sort_values('Total_Revenue', ascending=False)
+
+
+def home_aggregates(df):
+    """Everything the Home page shows for an already filtered frame"""
+    return {
+        'total_orders': len(df),
+        'total_revenue': df['total_revenue'].sum(),
+        'avg_order_value': df['amount'].mean(),
+        'total_quantity': df['Quantity'].sum(),
+        'date_min': df['date'].min(),
+        'date_max': df['date'].max(),
+        'n_categories': df['category'].nunique(),
+        'n_states': df['ship_state'].nunique(),
+        'n_cities': df['ship_city'].nunique(),
+        'top_states': sales_per_state(df).head(5),
+        'top_categories': df.groupby('category')['total_revenue'].sum().sort_values(ascending=False).head(5),
+        'status_dist': df['status'].value_counts(),
+    }
+
+
+def geographic_metrics(df):
+    """Metric cards of the Geographic page"""
+    return {
+        'orders': len(df),
+        'revenue': df['total_revenue'].sum(),
+        'avg_order_value': df['amount'].mean(),
+        'cities': df['ship_city'].nunique(),
+    }
+
+
+def top_cities(df, n, with_aov=False):
+    """Top n cities by revenue"""
+    agg = {'order_id': 'count', 'total_revenue': 'sum'}
+    columns = ['Orders', 'Revenue']
+    if with_aov:
+        agg['amount'] = 'mean'
+        columns.append('Avg_Order_Value')
+    city_data = df.groupby('ship_city').agg(agg).round(2)
+    city_data.columns = columns
+    return city_data.sort_values('Revenue', ascending=False).head(n)
+
+
+def geographic_aggregates(df):
+    """Everything the Geographic page shows for the globally filtered frame"""
+    # B2B vs B2C by state
+    state_customer = (df.groupby(['ship_state', 'customer_type']).size().unstack(fill_value=0)
+                      .reindex(columns=CUSTOMER_TYPES, fill_value=0))
+    state_customer = state_customer.loc[state_customer.sum(axis=1).nlargest(10).index]
+
+    # Delivery success by state
+    delivery_success = df[df['status'].str.contains('Delivered', na=False)]
+    state_delivery = (delivery_success.groupby('ship_state').size() /
+                      df.groupby('ship_state').size() * 100).round(2)
+
+    return {
+        'available_states': sorted(df['ship_state'].unique().tolist()),
+        'metrics': geographic_metrics(df),
+        'sales_per_state': sales_per_state(df),
+        'top_cities': top_cities(df, 20),
+        'state_customer': state_customer,
+        'state_delivery': state_delivery.nlargest(15),
+    }
+
+
+def time_aggregates(df):
+    """Everything the Time page shows for an already filtered frame"""
+    n_days = df['date'].nunique()
+    orders_per_day = df.groupby('date').size()
+
+    # Monthly revenue trend
+    monthly_data = df.groupby('month_name').agg({
+        'total_revenue': 'sum',
+        'order_id': 'count'
+    })
+    available_months = [m for m in MONTH_ORDER if m in monthly_data.index]
+    monthly_data = monthly_data.reindex(available_months) if available_months else None
+
+    # Monthly category performance
+    monthly_category = None
+    if not df.empty:
+        monthly_category = df.groupby(['month_name', 'category'])['total_revenue'].sum().unstack(fill_value=0)
+        available_months = [m for m in MONTH_ORDER if m in monthly_category.index]
+        monthly_category = monthly_category.reindex(available_months) if available_months else None
+
+    # Weekday pattern
+    sales_per_weekday = df.groupby('day_of_week').agg({
+        'order_id': 'count',
+        'total_revenue': 'sum',
+        'amount': 'mean',
+        'Quantity': 'sum'
+    }).round(2)
+    if not sales_per_weekday.empty:
+        sales_per_weekday.columns = ['Total_Orders', 'Total_Revenue', 'Avg_Order_Value', 'Total_Quantity']
+        available_days = [d for d in WEEKDAY_ORDER if d in sales_per_weekday.index]
+        if available_days:
+            sales_per_weekday = sales_per_weekday.reindex(available_days)
+
+    # Daily trends
+    daily_data = df.groupby('date').agg({
+        'order_id': 'count',
+        'total_revenue': 'sum',
+        'amount': 'mean'
+    }).reset_index()
+
+    # Heatmap of orders by week and day, without adding a column to the frame
+    heatmap_data = None
+    if not df.empty:
+        week = df['week'] if 'week' in df.columns else df['date'].dt.isocalendar().week
+        heatmap_data = df.groupby([week.rename('week'), 'day_of_week']).size().unstack(fill_value=0)
+        available_days = [d for d in WEEKDAY_ORDER if d in heatmap_data.columns]
+        heatmap_data = heatmap_data[available_days] if available_days else None
+
+    return {
+        'orders': len(df),
+        'revenue': df['total_revenue'].sum(),
+        'avg_daily_orders': len(df) / n_days if n_days > 0 else 0,
+        'peak_orders': orders_per_day.max() if not df.empty else 0,
+        'monthly_data': monthly_data,
+        'monthly_category': monthly_category,
+        'sales_per_weekday': sales_per_weekday,
+        'daily_data': daily_data,
+        'day_of_month': df.groupby(df['date'].dt.day).size(),
+        'heatmap_data': heatmap_data,
+    }
+
+
+def product_detail_aggregates(df):
+    """Metrics, size and price sections of the Product & Customer page"""
+    valid_prices = df.loc[df['unit_price'] != float('inf'), ['category', 'unit_price']]
+
+    size_category = None
+    popular_sizes = None
+    if not df.empty:
+        size_category = df.groupby(['category', 'size'])['Quantity'].sum().unstack(fill_value=0)
+        top_sizes = df.groupby('size')['Quantity'].sum().nlargest(7).index
+        size_category = size_category[size_category.columns.intersection(top_sizes)]
+
+        # Size with the maximum quantity for each category
+        popular_sizes_df = df.groupby(['category', 'size'])['Quantity'].sum().reset_index()
+        if not popular_sizes_df.empty:
+            idx = popular_sizes_df.groupby('category')['Quantity'].idxmax()
+            popular_sizes = popular_sizes_df.loc[idx]
+
+    tier_dist = None
+    tier_revenue = None
+    if 'price_tier' in df.columns and not df.empty:
+        tier_dist = df['price_tier'].value_counts()
+        tier_revenue = df.groupby('price_tier', observed=False)['total_revenue'].sum()
+
+    category_prices = None
+    if not valid_prices.empty:
+        category_prices = valid_prices.groupby('category')['unit_price'].mean().sort_values(ascending=False)
+
+    return {
+        'products_sold': df['Quantity'].sum(),
+        'revenue': df['total_revenue'].sum(),
+        'avg_unit_price': valid_prices['unit_price'].mean() if not valid_prices.empty else 0,
+        'cancellation_rate': (df['status'] == 'Cancelled').mean() * 100 if not df.empty else 0,
+        'size_category': size_category,
+        'popular_sizes': popular_sizes,
+        'size_revenue': df.groupby('size')['total_revenue'].sum().sort_values(ascending=False).head(10),
+        'tier_dist': tier_dist,
+        'tier_revenue': tier_revenue,
+        'category_prices': category_prices,
+        'valid_prices': valid_prices[['unit_price']],
+    }
+
+
+def product_customer_aggregates(df):
+    """Everything the Product & Customer page shows for the globally filtered frame"""
+    customer_comparison = None
+    customer_category = None
+    promo_impact = None
+    if not df.empty:
+        customer_comparison = df.groupby('customer_type').agg({
+            'order_id': 'count',
+            'total_revenue': 'sum',
+            'amount': 'mean'
+        }).round(2)
+        customer_comparison.columns = ['Orders', 'Revenue', 'AOV']
+        customer_category = (df.groupby(['category', 'customer_type']).size().unstack(fill_value=0)
+                             .reindex(columns=CUSTOMER_TYPES, fill_value=0))
+        if 'has_promotion' in df.columns:
+            promo_impact = (df.groupby(['customer_type', 'has_promotion'])['amount'].mean().unstack(fill_value=0)
+                            .reindex(columns=[False, True], fill_value=0))
+
+    return {
+        'available_categories': sorted(df['category'].unique().tolist()),
+        'category_revenue': df.groupby('category')['total_revenue'].sum().sort_values(ascending=False),
+        'category_volume': df.groupby('category')['Quantity'].sum().sort_values(ascending=False),
+        'cancellation_by_category': ((df['status'] == 'Cancelled').groupby(df['category']).mean() * 100)
+                                    .sort_values(ascending=False),
+        'customer_comparison': customer_comparison,
+        'customer_category': customer_category,
+        'promo_impact': promo_impact,
+        'detail': product_detail_aggregates(df),
+    }
+
+
+def sku_summary(df, level='sku'):
+    """One row per SKU or style: orders, quantity, revenue, cancellation rate and size shares.
+
+    The size_ columns hold each size's share of the row's quantity.
+    """
+    grouped = df.groupby(level, observed=True)
+    columns = {'style': grouped['style'].first()} if level == 'sku' else {}
+    summary = pd.DataFrame(columns | {
+        'category': grouped['category'].first(),
+        'orders': grouped['order_id'].count(),
+        'quantity': grouped['Quantity'].sum(),
+        'revenue': grouped['total_revenue'].sum(),
+        'cancellation_rate': (df['status'] == 'Cancelled').groupby(df[level], observed=True).mean() * 100,
+    })
+
+    sizes = df.groupby([level, 'size'], observed=True)['Quantity'].sum().unstack(fill_value=0)
+    shares = sizes.div(sizes.sum(axis=1).replace(0, 1), axis=0)
+    # The index and style stay interned; decode_ids turns the rows shown into strings
+    return summary.join(shares.add_prefix('size_'))
+
+
+# Page name -> function computing that page's aggregates from the globally filtered frame
+PAGE_AGGREGATES = {
+    'home': home_aggregates,
+    'geographic': geographic_aggregates,
+    'time': time_aggregates,
+    'product_customer': product_customer_aggregates,
+}
+
+
+def compute_page_aggregates(page, filters, data=None):
+    """Load the rows matching the (state, month, day) tuple and aggregate them for one page.
+
+    data is the utils.data_version() to read, the current one by default.
+    Results persist in the result store, so they survive restarts and are
+    shared with the other processes on the host.
+    """
+    if data is None:
+        data = data_version()
+    store = get_result_store()
+    if store is None:
+        return PAGE_AGGREGATES[page](load_filtered(*filters, version=data))
+    # The rows are loaded under the same data version the result is stored under
+    version = dataset_version(data)
+    result = store.get(version, (page, filters))
+    if result is None:
+        result = PAGE_AGGREGATES[page](load_filtered(*filters, version=data))
+        store.put(version, (page, filters), result)
+    return result
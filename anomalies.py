@@ -0,0 +1,176 @@
+"""Spike and drop detection over every daily (state, category) series at once.
+
+The data is pivoted once into a date x (state, category) matrix. Each cell
+is scored against the trailing ANOMALY_WINDOW days of its own series with
+a robust z-score, (value - median) / (1.4826 * MAD), computed for all
+series together on a sliding-window view of the matrix. The scale is never
+below the Poisson noise of the window's order counts, and windows with
+fewer than ANOMALY_MIN_ORDERS orders a day are not scored, so sparse
+series do not flag every order they get.
+
+Check the false positive rate on pure noise with:  python anomalies.py
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils import load_filtered
+
+# Days of history each cell is compared against
+ANOMALY_WINDOW = int(os.environ.get('ANOMALY_WINDOW', '14'))
+# |z| at or above which a cell is flagged (Iglewicz and Hoaglin's 3.5)
+ANOMALY_THRESHOLD = float(os.environ.get('ANOMALY_THRESHOLD', '3.5'))
+# Median daily orders a window needs before the day after it is scored
+ANOMALY_MIN_ORDERS = float(os.environ.get('ANOMALY_MIN_ORDERS', '3'))
+# Column and aggregation behind each metric
+METRICS = {'Orders': ('order_id', 'count'), 'Revenue': ('total_revenue', 'sum')}
+SERIES_KEYS = ['ship_state', 'category']
+
+# Scale MAD and mean absolute deviation to a normal standard deviation
+MAD_SCALE = 1.4826
+MEAN_AD_SCALE = 1.2533
+# Share of pure-noise cells `python anomalies.py` tolerates being flagged
+NOISE_MAX_RATE = 0.005
+
+
+def series_matrix(df, metric):
+    """Daily metric per (state, category): one row per calendar day, one column per series"""
+    column, how = METRICS[metric]
+    values = df.groupby(['date'] + SERIES_KEYS, observed=True)[column].agg(how)
+    matrix = values.unstack(SERIES_KEYS, fill_value=0)
+    # Days without any order are zeros, not gaps, so every window spans the same days
+    days = pd.date_range(df['date'].min(), df['date'].max(), freq='D')
+    return matrix.reindex(days, fill_value=0).astype('float64')
+
+
+def _median_of_sorted(s):
+    """Median along the last axis of an already sorted array"""
+    n = s.shape[-1]
+    return s[..., n // 2] if n % 2 else (s[..., n // 2 - 1] + s[..., n // 2]) / 2
+
+
+def _sorted_windows(values, window):
+    # Series-major float32 keeps each window contiguous and halves the
+    # memory of the (series, day, window) copy the sort makes
+    series = np.ascontiguousarray(values.T, dtype='float32')
+    # [s, i] holds days i .. i+window-1 of series s, the days before day i+window
+    return np.sort(sliding_window_view(series[:, :-1], window, axis=1), axis=-1)
+
+
+def rolling_robust_z(values, window=ANOMALY_WINDOW, counts=None, unit=1, min_orders=ANOMALY_MIN_ORDERS):
+    """Robust z-score of every cell against the previous window cells of its column.
+
+    counts are the daily orders behind values, values itself when omitted
+    (the Orders metric), and unit what one order adds to a value: 1 for
+    counts, the root mean square order revenue (per column) for sums. Returns (z, baseline median), both shaped like
+    values; the first window rows and cells whose history has a median
+    below min_orders orders or no spread at all are NaN.
+    """
+    z = np.full(values.shape, np.nan)
+    baseline = np.full(values.shape, np.nan)
+    if len(values) <= window:
+        return z, baseline
+
+    history = _sorted_windows(values, window)
+    median = _median_of_sorted(history)
+    orders = median if counts is None else _median_of_sorted(_sorted_windows(counts, window))
+    deviation = np.abs(history - median[..., None])
+    mean_ad = deviation.mean(axis=-1)
+    deviation.sort(axis=-1)
+    mad = _median_of_sorted(deviation)
+    # Sparse series often have a MAD of 0; fall back to the mean absolute deviation
+    scale = np.where(mad > 0, MAD_SCALE * mad, MEAN_AD_SCALE * mean_ad)
+    # A few weeks' MAD often undershoots the Poisson noise of n orders a
+    # day, unit * sqrt(n), and then noise scores as spikes
+    scale = np.maximum(scale, np.reshape(unit, (-1, 1)) * np.sqrt(orders))
+    scale = np.where(orders >= min_orders, scale, np.nan).T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z[window:] = np.where(scale > 0, (values[window:] - median.T) / scale, np.nan)
+    baseline[window:] = median.T
+    return z, baseline
+
+
+def detect_anomalies(df, metric='Orders', window=ANOMALY_WINDOW, threshold=ANOMALY_THRESHOLD):
+    """Every (date, state, category) cell whose |z| reaches threshold, strongest first"""
+    columns = ['date', 'ship_state', 'category', 'value', 'baseline', 'z_score', 'direction']
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    matrix = series_matrix(df, metric)
+    values = matrix.to_numpy()
+    counts, unit = None, 1
+    column, how = METRICS[metric]
+    if how != 'count':
+        counts = series_matrix(df, 'Orders').reindex(columns=matrix.columns, fill_value=0).to_numpy()
+        squares = (df[column] ** 2).groupby([df[key] for key in SERIES_KEYS], observed=True).mean()
+        unit = np.sqrt(squares.reindex(matrix.columns).to_numpy())
+    z, baseline = rolling_robust_z(values, window, counts, unit)
+
+    rows, cols = np.nonzero(np.abs(np.nan_to_num(z)) >= threshold)
+    series = matrix.columns[cols]
+    flagged = pd.DataFrame({
+        'date': matrix.index[rows],
+        'ship_state': series.get_level_values('ship_state'),
+        'category': series.get_level_values('category'),
+        'value': values[rows, cols],
+        'baseline': baseline[rows, cols].round(2),
+        'z_score': z[rows, cols].round(2),
+        'direction': np.where(z[rows, cols] > 0, 'Spike', 'Drop'),
+    })
+    return flagged.sort_values('z_score', key=abs, ascending=False, ignore_index=True)
+
+
+@st.cache_data(max_entries=len(METRICS))
+def flagged_cells(metric, version):
+    """Anomalies over the full history, so windows reach back past any month filter.
+
+    version is the utils.data_version() to read, so new data is scanned again.
+    """
+    return detect_anomalies(load_filtered(version=version), metric)
+
+
+def filter_flagged(flagged, state='All', month='All', day='All'):
+    """Flagged cells falling inside the global filters"""
+    mask = np.ones(len(flagged), dtype=bool)
+    if state != 'All':
+        mask &= (flagged['ship_state'] == state).to_numpy()
+    if month != 'All':
+        mask &= (flagged['date'].dt.month_name() == month).to_numpy()
+    if day != 'All':
+        mask &= (flagged['date'].dt.day_name() == day).to_numpy()
+    return flagged[mask]
+
+
+def noise_flag_rates(days=91, n_series=300, seed=0):
+    """Share of scored cells each metric flags on pure noise.
+
+    Each series gets Poisson orders at a rate between 0.1 and 50 a day, and
+    each order a Gamma-distributed amount.
+    """
+    rng = np.random.default_rng(seed)
+    daily = np.exp(rng.uniform(np.log(0.1), np.log(50), n_series))
+    orders = rng.poisson(daily, size=(days, n_series)).astype('float64')
+    # A sum of n Gamma(k, theta) amounts is Gamma(n * k, theta)
+    revenue = rng.gamma(np.maximum(orders, 1) * 6, 100) * (orders > 0)
+    # Root mean square of a Gamma(6, 100) amount
+    unit = np.sqrt(6 * 7) * 100
+    rates = {}
+    for metric, values, counts, u in (('Orders', orders, None, 1), ('Revenue', revenue, orders, unit)):
+        z, _ = rolling_robust_z(values, counts=counts, unit=u)
+        scored = ~np.isnan(z)
+        rates[metric] = (np.abs(z[scored]) >= ANOMALY_THRESHOLD).mean()
+    return rates
+
+
+if __name__ == '__main__':
+    # Pure noise has nothing to find, so every flag here is a false positive
+    failed = False
+    for metric, rate in noise_flag_rates().items():
+        print(f"{metric}: {rate:.3%} of scored noise cells flagged")
+        failed |= rate > NOISE_MAX_RATE
+    sys.exit(1 if failed else 0)
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import base64
+from memory import measure_render, show_memory_stats
 
 # Function to convert image to base64 
 def get_base64_of_image(img_path):
@@ -105,22 +106,27 @@ st.markdown("---")
 st.sidebar.title("Navigation")
 page = st.sidebar.radio(
     "Go to",
-    ["🏠 Home", "🗺️ Geographic Analysis", "📅 Time Analysis", "🛍️ Product & Customer Analysis"]
+    ["🏠 Home", "🗺️ Geographic Analysis", "📅 Time Analysis", "🛍️ Product & Customer Analysis", "🔎 SKU Explorer"]
 )
 
-# Route to appropriate page
-if page == "🏠 Home":
-    from pages_files.home import show_home_page
-    show_home_page()
-elif page == "🗺️ Geographic Analysis":
-    from pages_files.geographic_analysis import show_geographic_analysis
-    show_geographic_analysis()
-elif page == "📅 Time Analysis":
-    from pages_files.time_analysis import show_time_analysis
-    show_time_analysis()
-elif page == "🛍️ Product & Customer Analysis":
-    from pages_files.product_customer_analysis import show_product_customer_analysis
-    show_product_customer_analysis()
+# Route to appropriate page, accounting for the memory the render uses
+with measure_render(page):
+    if page == "🏠 Home":
+        from pages_files.home import show_home_page
+        show_home_page()
+    elif page == "🗺️ Geographic Analysis":
+        from pages_files.geographic_analysis import show_geographic_analysis
+        show_geographic_analysis()
+    elif page == "📅 Time Analysis":
+        from pages_files.time_analysis import show_time_analysis
+        show_time_analysis()
+    elif page == "🛍️ Product & Customer Analysis":
+        from pages_files.product_customer_analysis import show_product_customer_analysis
+        show_product_customer_analysis()
+    elif page == "🔎 SKU Explorer":
+        from pages_files.sku_explorer import show_sku_explorer
+        show_sku_explorer()
+show_memory_stats()
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,204 @@
+"""Render static HTML snapshots of the dashboard for every state/month combination.
+
+    python batch_report.py [--out reports] [--workers 4] [--inline-plotlyjs]
+
+Each report holds every page's metrics and charts for one (state, month)
+filter, built with the same aggregate and figure functions as the app.
+"""
+import argparse
+import html
+import multiprocessing as mp
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from plotly.offline import get_plotlyjs
+
+from aggregates import PAGE_AGGREGATES
+from partitions import has_partitions, read_partitions
+from utils import DATA_PATH, read_cleaned_data
+from pages_files.home import home_figures
+from pages_files.geographic_analysis import geographic_figures
+from pages_files.time_analysis import time_figures
+from pages_files.product_customer_analysis import product_customer_figures, product_detail_figures
+
+PLOTLYJS_FILE = 'plotly.min.js'
+
+# (title, aggregate key, figure builder, metric cards as (label, lookup, format))
+PAGE_SECTIONS = [
+    ('🏠 Home', 'home', home_figures, [
+        ('Total Orders', lambda a: a['total_orders'], '{:,}'),
+        ('Total Revenue', lambda a: a['total_revenue'], '₹{:,.0f}'),
+        ('Average Order Value', lambda a: a['avg_order_value'], '₹{:.2f}'),
+        ('Total Products Sold', lambda a: a['total_quantity'], '{:,}'),
+    ]),
+    ('🗺️ Geographic Analysis', 'geographic', geographic_figures, [
+        ('Orders', lambda a: a['metrics']['orders'], '{:,}'),
+        ('Revenue', lambda a: a['metrics']['revenue'], '₹{:,.0f}'),
+        ('Avg Order Value', lambda a: a['metrics']['avg_order_value'], '₹{:.2f}'),
+        ('Cities Served', lambda a: a['metrics']['cities'], '{}'),
+    ]),
+    ('📅 Time Analysis', 'time', time_figures, [
+        ('Orders', lambda a: a['orders'], '{:,}'),
+        ('Revenue', lambda a: a['revenue'], '₹{:,.0f}'),
+        ('Avg Daily Orders', lambda a: a['avg_daily_orders'], '{:.0f}'),
+        ('Peak Day Orders', lambda a: a['peak_orders'], '{}'),
+    ]),
+    ('🛍️ Product & Customer Analysis', 'product_customer',
+     lambda aggs: {**product_customer_figures(aggs), **product_detail_figures(aggs['detail'])}, [
+        ('Products Sold', lambda a: a['detail']['products_sold'], '{:,}'),
+        ('Revenue', lambda a: a['detail']['revenue'], '₹{:,.0f}'),
+        ('Avg Unit Price', lambda a: a['detail']['avg_unit_price'], '₹{:.2f}'),
+        ('Cancellation Rate', lambda a: a['detail']['cancellation_rate'], '{:.1f}%'),
+    ]),
+]
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Amazon Sales Dashboard - {title}</title>
+{plotlyjs}
+<style>
+    body {{ font-family: sans-serif; margin: 20px; }}
+    .main-header {{ background-color: #1f4788; color: white; padding: 20px; border-radius: 10px; text-align: center; }}
+    .metrics {{ display: flex; gap: 10px; }}
+    .metric-container {{ background-color: #f0f2f6; padding: 20px; border-radius: 10px; margin: 10px 0; flex: 1; }}
+</style>
+</head>
+<body>
+<div class="main-header"><h1>🛍️ Amazon Sales Dashboard</h1><p>{title}</p></div>
+{body}
+</body>
+</html>
+"""
+
+# Full dataset, loaded once in the parent and inherited by forked workers
+_DATASET = None
+
+
+def _init_worker(path):
+    global _DATASET
+    if _DATASET is None:
+        # Start methods without fork (Windows, macOS default) load their own copy
+        _DATASET = load_dataset(path)
+
+
+def load_dataset(path=DATA_PATH):
+    """Full cleaned data, from the CSV or the partitioned copy"""
+    if os.path.exists(path):
+        return read_cleaned_data(path)
+    if has_partitions():
+        return read_partitions()
+    raise FileNotFoundError(f"{path} not found; run the cleaning notebook first")
+
+
+def slug(value):
+    return re.sub(r'[^0-9a-zA-Z]+', '-', value).strip('-').lower()
+
+
+def report_name(state, month):
+    return f"state-{slug(state)}__month-{slug(month)}.html"
+
+
+def render_section(title, aggs, build_figures, metrics):
+    """HTML for one page: its metric cards followed by its charts"""
+    parts = [f"<h2>{html.escape(title)}</h2>", '<div class="metrics">']
+    for label, lookup, fmt in metrics:
+        parts.append(f'<div class="metric-container"><b>{html.escape(label)}</b><br>'
+                     f'{html.escape(fmt.format(lookup(aggs)))}</div>')
+    parts.append('</div>')
+    for chart_title, fig in build_figures(aggs).items():
+        if fig is None:
+            continue
+        parts.append(f"<h3>{html.escape(chart_title)}</h3>")
+        parts.append(fig.to_html(full_html=False, include_plotlyjs=False))
+    return '\n'.join(parts)
+
+
+def write_report(df, state, month, out_dir, inline_plotlyjs):
+    """Render every page for one filtered slice to a single HTML file"""
+    title = f"State: {state} | Month: {month}"
+    if df.empty:
+        body = "<p>No data available for the selected filters</p>"
+    else:
+        body = '\n'.join(
+            render_section(page_title, PAGE_AGGREGATES[page](df), build_figures, metrics)
+            for page_title, page, build_figures, metrics in PAGE_SECTIONS
+        )
+    if inline_plotlyjs:
+        plotlyjs = f"<script>{get_plotlyjs()}</script>"
+    else:
+        plotlyjs = f'<script src="{PLOTLYJS_FILE}"></script>'
+
+    path = os.path.join(out_dir, report_name(state, month))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(PAGE_TEMPLATE.format(title=html.escape(title), plotlyjs=plotlyjs, body=body))
+    return path
+
+
+def render_month(month, states, out_dir, inline_plotlyjs):
+    """Render one month for a batch of states.
+
+    The month slice does not depend on the state being iterated, so it is
+    cut once per task and every state report filters that smaller frame.
+    """
+    month_df = _DATASET if month == 'All' else _DATASET[_DATASET['month_name'] == month]
+    written = []
+    for state in states:
+        df = month_df if state == 'All' else month_df[month_df['ship_state'] == state]
+        written.append(write_report(df, state, month, out_dir, inline_plotlyjs))
+    return written
+
+
+def write_index(out_dir, states, months):
+    rows = []
+    for state in states:
+        links = ' | '.join(f'<a href="{report_name(state, month)}">{html.escape(month)}</a>' for month in months)
+        rows.append(f"<li>{html.escape(state)}: {links}</li>")
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(PAGE_TEMPLATE.format(title='Reports', plotlyjs='', body=f"<ul>{''.join(rows)}</ul>"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render dashboard snapshots for every state and month")
+    parser.add_argument('--out', default='reports', help="output directory")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--chunk', type=int, default=8, help="states rendered per task")
+    parser.add_argument('--inline-plotlyjs', action='store_true',
+                        help="embed plotly.js in every report instead of sharing one file")
+    args = parser.parse_args()
+
+    global _DATASET
+    _DATASET = load_dataset()
+    states = ['All'] + sorted(_DATASET['ship_state'].unique().tolist())
+    months = ['All'] + sorted(_DATASET['month_name'].unique().tolist())
+
+    os.makedirs(args.out, exist_ok=True)
+    if not args.inline_plotlyjs:
+        # One copy of plotly.js shared by every report
+        with open(os.path.join(args.out, PLOTLYJS_FILE), 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+    write_index(args.out, states, months)
+
+    tasks = [(month, states[i:i + args.chunk]) for month in months for i in range(0, len(states), args.chunk)]
+    # Forked workers share the parent's loaded frame instead of re-reading it
+    context = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else None
+
+    start = time.perf_counter()
+    rendered = 0
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                             initializer=_init_worker, initargs=(DATA_PATH,)) as pool:
+        futures = [pool.submit(render_month, month, chunk, args.out, args.inline_plotlyjs)
+                   for month, chunk in tasks]
+        for future in as_completed(futures):
+            rendered += len(future.result())
+    elapsed = time.perf_counter() - start
+
+    print(f"Rendered {rendered} reports to {args.out} in {elapsed:.1f}s "
+          f"({rendered / elapsed:.2f} reports/s, {args.workers} workers)")
+
+
+if __name__ == '__main__':
+    main()
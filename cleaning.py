@@ -0,0 +1,268 @@
+"""The cleaning notebook as a DAG of named, cached stages.
+
+    python cleaning.py [--raw data/Amazon_Sale_Report.csv] [--out data/Amazon_Sales_Cleaned.csv]
+
+Every stage's output is kept in CLEANING_CACHE as parquet, under a key
+hashed from its input data, its parameters, its own source code, the
+source of the repo functions it calls and the pandas/numpy versions. A
+re-run only executes the stages whose key changed: editing CITY_MAPPING
+re-runs normalize_locations and everything after it, changing the price
+tier bins re-runs derive_features alone. Stages whose input is unchanged
+and whose output is cached are not even read back unless a later stage
+needs them.
+"""
+import argparse
+import glob
+import hashlib
+import inspect
+import json
+import os
+import time
+from graphlib import TopologicalSorter
+
+import numpy as np
+import pandas as pd
+
+from location_mappings import STATE_MAPPING, CITY_MAPPING
+from utils import DATA_PATH, PRICE_TIERS, file_hash
+
+RAW_PATH = 'data/Amazon_Sale_Report.csv'
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+CLEANING_CACHE = 'data/.cleaning_cache'
+# Cached outputs kept per stage, so switching a parameter back is still a hit
+CACHE_KEEP = 3
+
+
+def standardize(df, drop_columns):
+    """01/03/06 - snake_case column names, drop unused columns, rename qty"""
+    df = df.copy()
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('-', '_')
+    return df.drop(columns=drop_columns).rename(columns={'qty': 'Quantity'})
+
+
+def drop_nulls(df, address_columns):
+    """02 - drop the rows without a shipping address"""
+    return df.dropna(subset=address_columns).reset_index(drop=True)
+
+
+def dedup(df):
+    """04 - drop duplicate rows"""
+    return df.drop_duplicates().reset_index(drop=True)
+
+
+def convert_types(df, date_format):
+    """04/05 - parse the date and make the postal code an int"""
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date'], format=date_format)
+    df['ship_postal_code'] = df['ship_postal_code'].astype('int')
+    return df
+
+
+def normalize_locations(df, state_mapping, city_mapping):
+    """07 - lower-case state and city names and merge their spelling variants"""
+    df = df.copy()
+    df['ship_state'] = df['ship_state'].str.lower().str.strip().replace(state_mapping)
+    df['ship_city'] = df['ship_city'].str.lower().str.strip().replace(city_mapping)
+    return df
+
+
+def fill(df, currency, no_promotion, unknown_courier_status):
+    """08/09/10 - fill currency, promotion ids and courier status"""
+    df = df.copy()
+    df['currency'] = df['currency'].fillna(currency)
+    df['promotion_ids'] = df['promotion_ids'].fillna(no_promotion)
+    df.loc[df['status'] == 'Cancelled', 'courier_status'] = 'Cancelled'
+    df['courier_status'] = df['courier_status'].fillna(unknown_courier_status)
+    return df
+
+
+def impute_amount(df):
+    """11 - fill missing amounts from the style's median unit price times quantity"""
+    df = df.copy()
+    mask_valid = (df['amount'] > 0) & (df['Quantity'] > 0)
+    unit_price = df['amount'] / df['Quantity']
+    median_price = df['style'].map(unit_price[mask_valid].groupby(df['style']).median())
+    # Styles without a valid price fall back to the overall median
+    median_price = median_price.fillna(unit_price[mask_valid].median())
+    df['amount'] = np.where(df['amount'].isna(), df['Quantity'] * median_price, df['amount'])
+    return df
+
+
+def derive_features(df, price_bins, price_labels):
+    """Date parts, promotion flag, price tier, unit price, customer type and revenue"""
+    df = df.copy()
+    df['month'] = df['date'].dt.month
+    df['month_name'] = df['date'].dt.month_name()
+    df['day_of_week'] = df['date'].dt.day_name()
+    df['has_promotion'] = df['promotion_ids'] != 'No Promotion'
+    df['price_tier'] = pd.cut(df['amount'], bins=price_bins, labels=price_labels)
+    df['unit_price'] = df['amount'] / df['Quantity']
+    df['customer_type'] = np.where(df['b2b'], 'B2B', 'B2C')
+    df['total_revenue'] = df['amount'] * df['Quantity']
+    df['day_of_month'] = df['date'].dt.day
+    df['week_of_year'] = df['date'].dt.isocalendar().week
+    return df
+
+
+# name -> (function, input stages, parameters); 'raw' is the raw CSV
+STAGES = {
+    'standardize': (standardize, ['raw'], {'drop_columns': ['unnamed:_22', 'fulfilled_by']}),
+    'drop_nulls': (drop_nulls, ['standardize'],
+                   {'address_columns': ['ship_city', 'ship_state', 'ship_postal_code', 'ship_country']}),
+    'dedup': (dedup, ['drop_nulls'], {}),
+    'convert_types': (convert_types, ['dedup'], {'date_format': '%m-%d-%y'}),
+    'normalize_locations': (normalize_locations, ['convert_types'],
+                            {'state_mapping': STATE_MAPPING, 'city_mapping': CITY_MAPPING}),
+    'fill': (fill, ['normalize_locations'],
+             {'currency': 'INR', 'no_promotion': 'No Promotion', 'unknown_courier_status': 'Unknown'}),
+    'impute_amount': (impute_amount, ['fill'], {}),
+    'derive_features': (derive_features, ['impute_amount'],
+                        {'price_bins': [0, 300, 600, 900, float('inf')], 'price_labels': PRICE_TIERS}),
+}
+
+
+def frame_hash(df):
+    """Hash of a frame's values, index, column names and dtypes"""
+    h = hashlib.sha256()
+    h.update(json.dumps([df.columns.tolist(), df.dtypes.astype(str).tolist()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+def code_sources(function, seen=None):
+    """Source of function plus every repo function and constant it reaches through global names"""
+    seen = set() if seen is None else seen
+    seen.add(function)
+    sources = [inspect.getsource(function)]
+    codes = [function.__code__]
+    while codes:
+        code = codes.pop()
+        # Comprehensions and lambdas have code objects of their own
+        codes.extend(c for c in code.co_consts if inspect.iscode(c))
+        for global_name in code.co_names:
+            value = function.__globals__.get(global_name)
+            if inspect.isfunction(value):
+                if value not in seen and os.path.dirname(inspect.getfile(value)) == REPO_DIR:
+                    sources += code_sources(value, seen)
+            elif isinstance(value, (str, int, float, list, tuple, dict)):
+                sources.append(f"{global_name} = {value!r}")
+    return sources
+
+
+def stage_key(name, input_hashes):
+    """Cache key of one stage: its inputs' content, its code and its parameters"""
+    function, _, params = STAGES[name]
+    h = hashlib.sha256()
+    for part in (name, *input_hashes, *code_sources(function), pd.__version__, np.__version__,
+                 json.dumps(params, sort_keys=True, default=str)):
+        h.update(part.encode())
+    return h.hexdigest()[:16]
+
+
+def cache_path(cache_dir, name, key):
+    return os.path.join(cache_dir, f"{name}-{key}.parquet")
+
+
+def read_cached(cache_dir, name, key):
+    """Output hash of a cached stage, or None when it has not been cached"""
+    try:
+        with open(cache_path(cache_dir, name, key) + '.json') as f:
+            return json.load(f)['output_hash']
+    except FileNotFoundError:
+        return None
+
+
+def write_cached(cache_dir, name, key, df, output_hash):
+    path = cache_path(cache_dir, name, key)
+    df.to_parquet(path)
+    # The sidecar is written last, so a half-written parquet is never a hit
+    with open(path + '.json', 'w') as f:
+        json.dump({'output_hash': output_hash, 'rows': len(df)}, f)
+
+    # Keep the newest few outputs of this stage
+    stale = sorted(glob.glob(os.path.join(cache_dir, f"{name}-*.parquet")), key=os.path.getmtime)[:-CACHE_KEEP]
+    for old in stale:
+        for p in (old, old + '.json'):
+            if os.path.exists(p):
+                os.remove(p)
+
+
+def run_pipeline(raw_path=RAW_PATH, cache_dir=CLEANING_CACHE, target='derive_features'):
+    """Run the stages target depends on, reusing cached outputs.
+
+    Returns the target's output and one report row per stage with its
+    status ('cached' or 'ran'), seconds spent and output rows.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    graph = {name: inputs for name, (_, inputs, _) in STAGES.items()}
+    needed = set()
+    pending = [target]
+    while pending:
+        name = pending.pop()
+        if name != 'raw' and name not in needed:
+            needed.add(name)
+            pending.extend(graph[name])
+
+    start = time.perf_counter()
+    hashes = {'raw': file_hash(raw_path)}
+    keys = {}
+    frames = {}
+    report = [{'stage': 'raw', 'status': 'hashed', 'seconds': time.perf_counter() - start, 'rows': None}]
+
+    def frame(name):
+        # Cached outputs are only read back when a stage that ran needs them
+        if name not in frames:
+            if name == 'raw':
+                frames[name] = pd.read_csv(raw_path, index_col=0)
+            else:
+                frames[name] = pd.read_parquet(cache_path(cache_dir, name, keys[name]))
+        return frames[name]
+
+    for name in TopologicalSorter(graph).static_order():
+        if name not in needed:
+            continue
+        function, inputs, params = STAGES[name]
+        start = time.perf_counter()
+        keys[name] = stage_key(name, [hashes[i] for i in inputs])
+        output_hash = read_cached(cache_dir, name, keys[name])
+        if output_hash is not None:
+            status = 'cached'
+        else:
+            status = 'ran'
+            df = function(*[frame(i) for i in inputs], **params)
+            output_hash = frame_hash(df)
+            write_cached(cache_dir, name, keys[name], df, output_hash)
+            frames[name] = df
+        hashes[name] = output_hash
+        rows = len(frames[name]) if name in frames else None
+        report.append({'stage': name, 'status': status, 'seconds': time.perf_counter() - start, 'rows': rows})
+
+    start = time.perf_counter()
+    df = frame(target)
+    report[-1]['seconds'] += time.perf_counter() - start
+    report[-1]['rows'] = len(df)
+    return df, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean the raw sales report, re-running only changed stages")
+    parser.add_argument('--raw', default=RAW_PATH)
+    parser.add_argument('--out', default=DATA_PATH)
+    parser.add_argument('--cache', default=CLEANING_CACHE)
+    parser.add_argument('--target', default='derive_features', choices=list(STAGES))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df, report = run_pipeline(args.raw, args.cache, args.target)
+    df.to_csv(args.out, index=False)
+
+    for row in report:
+        rows = '' if row['rows'] is None else f"{row['rows']:,} rows"
+        print(f"{row['stage']:<20} {row['status']:<7} {row['seconds']:7.2f}s  {rows}")
+    hits = sum(row['status'] == 'cached' for row in report)
+    print(f"{hits}/{len(report) - 1} stages from cache, wrote {args.out} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Packed integer encoding of the high-cardinality ID columns.
+
+Amazon order IDs look like '405-8078784-5731545': a 3-character group and
+two 7-digit numbers. They are packed losslessly into one int64 as
+
+    group * 10**14 + first * 10**7 + second
+
+where a numeric group is its own value (0-999) and an alphanumeric one
+such as 'S02' is 1000 + its base-36 value. IDs that do not have this shape
+get negative codes indexing a small table kept in df.attrs, which pandas
+carries through filtering, concat, pickling and parquet.
+
+sku and style are interned into Categoricals. Everything that only counts
+or partitions works on the integers; decode_ids restores the strings of the
+rows actually shown, such as the SKU explorer's current page.
+"""
+import numpy as np
+import pandas as pd
+
+ORDER_ID_PATTERN = r'[0-9A-Z]{3}-[0-9]{7}-[0-9]{7}'
+INTERNED_COLUMNS = ['sku', 'style']
+# df.attrs key holding the order IDs that could not be packed
+UNPACKED_ATTR = 'order_id_unpacked'
+
+
+def _group_code(group):
+    return int(group) if group.isdigit() else 1000 + int(group, 36)
+
+
+def _group_name(code):
+    if code < 1000:
+        return f'{code:03d}'
+    code -= 1000
+    digits = ''
+    for _ in range(3):
+        code, digit = divmod(code, 36)
+        digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'[digit] + digits
+    return digits
+
+
+def encode_order_ids(ids):
+    """Pack order IDs into int64 codes; returns the codes and the table of unpackable IDs"""
+    ids = pd.Series(ids).reset_index(drop=True)
+    packed = ids.str.fullmatch(ORDER_ID_PATTERN).fillna(False).to_numpy(dtype=bool)
+    codes = np.empty(len(ids), dtype='int64')
+
+    # Fixed-width fields, so slicing is much cheaper than regex groups
+    valid = ids[packed]
+    # Only a handful of distinct groups, so convert each once
+    group_index, groups = pd.factorize(valid.str.slice(0, 3))
+    group_codes = np.array([_group_code(g) for g in groups], dtype='int64')[group_index]
+    codes[packed] = (group_codes * 10**14
+                     + valid.str.slice(4, 11).astype('int64').to_numpy() * 10**7
+                     + valid.str.slice(12, 19).astype('int64').to_numpy())
+
+    # Keep NaN as its own entry so it cannot collide with a packed code
+    unpacked_index, unpacked = pd.factorize(ids[~packed], use_na_sentinel=False)
+    codes[~packed] = -1 - unpacked_index
+    return codes, list(unpacked)
+
+
+def decode_order_ids(codes, unpacked=()):
+    """Turn int64 codes from encode_order_ids back into the original strings"""
+    codes = np.asarray(codes, dtype='int64')
+    out = np.empty(len(codes), dtype=object)
+    packed = codes >= 0
+
+    group_index, groups = pd.factorize(codes[packed] // 10**14)
+    group_names = np.array([_group_name(g) for g in groups], dtype=object)[group_index]
+    first = pd.Series(codes[packed] // 10**7 % 10**7).astype(str).str.zfill(7).to_numpy(dtype=object)
+    second = pd.Series(codes[packed] % 10**7).astype(str).str.zfill(7).to_numpy(dtype=object)
+    out[packed] = group_names + '-' + first + '-' + second
+
+    out[~packed] = np.array(list(unpacked) + [None], dtype=object)[-1 - codes[~packed]]
+    return out
+
+
+def pack_id_columns(df):
+    """Pack order_id and intern sku/style in place; returns df"""
+    if 'order_id' in df.columns and not pd.api.types.is_integer_dtype(df['order_id']):
+        codes, unpacked = encode_order_ids(df['order_id'])
+        df['order_id'] = codes
+        df.attrs[UNPACKED_ATTR] = unpacked
+    for column in INTERNED_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = pd.Categorical(df[column])
+    return df
+
+
+def decode_ids(df):
+    """Copy of df with the original order_id, sku and style strings, for display"""
+    df = df.copy()
+    if 'order_id' in df.columns and pd.api.types.is_integer_dtype(df['order_id']):
+        df['order_id'] = decode_order_ids(df['order_id'], df.attrs.get(UNPACKED_ATTR, ()))
+    for column in INTERNED_COLUMNS:
+        if column in df.columns and isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype(object)
+    return df
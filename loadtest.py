@@ -0,0 +1,155 @@
+"""Concurrent-session load test for app.py built on Streamlit's AppTest.
+
+    python loadtest.py --sessions 20 --concurrency 5 --steps 12 [--json results.json]
+
+Every simulated session opens the app, visits every page, then keeps
+navigating and changing filters at random (seeded, so runs are repeatable).
+All sessions run in this one process, sharing its caches the way real
+users share one dashboard process. Needs only the local data files.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from streamlit.logger import set_log_level
+from streamlit.testing.v1 import AppTest
+from memory import current_rss_mb, peak_rss_mb
+
+PAGES = ["🏠 Home", "🗺️ Geographic Analysis", "📅 Time Analysis", "🛍️ Product & Customer Analysis",
+         "🔎 SKU Explorer"]
+
+
+class SimulatedSession:
+    """One user clicking through the dashboard"""
+
+    def __init__(self, app_path, seed, timeout):
+        self.at = AppTest.from_file(app_path, default_timeout=timeout)
+        self.rng = random.Random(seed)
+        self.latencies = []
+        self.errors = []
+        self.frames_mb = 0.0
+
+    def _rerun(self, label, action):
+        start = time.perf_counter()
+        action().run()
+        self.latencies.append(time.perf_counter() - start)
+        if self.at.exception:
+            self.errors.append(f"{label}: {self.at.exception[0].message}")
+        if 'memory_report' in self.at.session_state:
+            self.frames_mb = max(self.frames_mb, self.at.session_state['memory_report']['frames_mb'])
+
+    def navigate(self, page):
+        self._rerun(f"open {page}", lambda: self.at.sidebar.radio[0].set_value(page))
+
+    def change_filter(self, page):
+        """Pick a new value in one of the page's selectboxes"""
+        if not self.at.selectbox:
+            return
+        box = self.rng.choice(list(self.at.selectbox))
+        value = self.rng.choice(list(box.options))
+        self._rerun(f"{page} / {box.label} = {value}", lambda: box.set_value(value))
+
+    def run(self, steps):
+        self._rerun("first load", lambda: self.at)
+        # Every session covers every page first, then wanders
+        script = PAGES + [self.rng.choice(PAGES) for _ in range(max(0, steps - len(PAGES)))]
+        for page in script:
+            self.navigate(page)
+            if self.rng.random() < 0.6:
+                self.change_filter(page)
+        return self
+
+
+def run_load_test(app_path, sessions, concurrency, steps, seed, timeout, warmup):
+    """Run the sessions and summarise latency, throughput and memory"""
+    # Warm the process-wide caches so the numbers describe steady state
+    for i in range(warmup):
+        SimulatedSession(app_path, seed - 1 - i, timeout).run(len(PAGES))
+
+    base_rss = current_rss_mb()
+    samples = []
+    stop = threading.Event()
+
+    def sample_rss():
+        while not stop.wait(0.1):
+            samples.append(current_rss_mb())
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        finished = list(pool.map(
+            lambda i: SimulatedSession(app_path, seed + i, timeout).run(steps), range(sessions)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+
+    latencies = np.array([lat for s in finished for lat in s.latencies]) * 1000
+    peak = max(samples + [current_rss_mb()])
+    return {
+        'sessions': sessions,
+        'concurrency': concurrency,
+        'reruns': int(latencies.size),
+        'errors': [e for s in finished for e in s.errors],
+        'wall_seconds': round(elapsed, 2),
+        'reruns_per_second': round(latencies.size / elapsed, 2),
+        'sessions_per_minute': round(sessions / elapsed * 60, 2),
+        'latency_ms': {
+            f'p{p}': round(float(np.percentile(latencies, p)), 1) for p in (50, 90, 95, 99)
+        } | {'max': round(float(latencies.max()), 1)},
+        'rss_mb': {
+            'baseline': round(base_rss, 1),
+            'peak_during_run': round(peak, 1),
+            'process_peak': round(peak_rss_mb(), 1),
+            # Memory added per concurrently active session over the warm baseline
+            'per_session': round((peak - base_rss) / min(concurrency, sessions), 2),
+        },
+        # Largest set of frames one render of each session built (memory.track)
+        'session_frames_mb': {
+            'mean': round(float(np.mean([s.frames_mb for s in finished])), 2),
+            'max': round(float(np.max([s.frames_mb for s in finished])), 2),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive many simulated sessions against app.py")
+    parser.add_argument('--app', default='app.py')
+    parser.add_argument('--sessions', type=int, default=20, help="total simulated sessions")
+    parser.add_argument('--concurrency', type=int, default=5, help="sessions running at the same time")
+    parser.add_argument('--steps', type=int, default=12, help="page visits per session")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=120, help="seconds allowed per rerun")
+    parser.add_argument('--warmup', type=int, default=1, help="sessions run before measuring")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    # Bare-mode and deprecation warnings repeat on every rerun of every session
+    set_log_level('error')
+    results = run_load_test(args.app, args.sessions, args.concurrency, args.steps,
+                            args.seed, args.timeout, args.warmup)
+
+    latency = results['latency_ms']
+    rss = results['rss_mb']
+    print(f"{results['sessions']} sessions x {args.steps} steps, concurrency {results['concurrency']}")
+    print(f"reruns: {results['reruns']} in {results['wall_seconds']}s "
+          f"({results['reruns_per_second']} reruns/s, {results['sessions_per_minute']} sessions/min)")
+    print("rerun latency ms: " + ', '.join(f"{k} {v}" for k, v in latency.items()))
+    print(f"rss MB: baseline {rss['baseline']}, peak {rss['peak_during_run']}, "
+          f"per concurrent session {rss['per_session']}")
+    print(f"frames per session render MB: mean {results['session_frames_mb']['mean']}, "
+          f"max {results['session_frames_mb']['max']}")
+    if results['errors']:
+        print(f"{len(results['errors'])} reruns raised, first: {results['errors'][0]}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
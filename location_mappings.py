@@ -0,0 +1,271 @@
+"""State and city spelling variants mapped to one canonical name (from the cleaning notebook)"""
+
+# Create a comprehensive mapping for all state variations
+STATE_MAPPING = {
+    # Delhi variations
+    'delhi': 'delhi',
+    'new delhi': 'delhi',
+    
+    # Rajasthan variations
+    'rajasthan': 'rajasthan',
+    'rajshthan': 'rajasthan',
+    'rajsthan': 'rajasthan',
+    'rj': 'rajasthan',
+    
+    # Punjab variations
+    'punjab': 'punjab',
+    'punjab/mohali/zirakpur': 'punjab',
+    'pb': 'punjab',
+    
+    # Puducherry variations
+    'puducherry': 'puducherry',
+    'pondicherry': 'puducherry',
+    
+    # Odisha variations (Orissa is the old name)
+    'odisha': 'odisha',
+    'orissa': 'odisha',
+    
+    # Arunachal Pradesh variations
+    'arunachal pradesh': 'arunachal pradesh',
+    'ar': 'arunachal pradesh',
+    
+    # Other states (keep as is)
+    'maharashtra': 'maharashtra',
+    'karnataka': 'karnataka',
+    'tamil nadu': 'tamil nadu',
+    'uttar pradesh': 'uttar pradesh',
+    'chandigarh': 'chandigarh',
+    'telangana': 'telangana',
+    'andhra pradesh': 'andhra pradesh',
+    'haryana': 'haryana',
+    'assam': 'assam',
+    'jharkhand': 'jharkhand',
+    'chhattisgarh': 'chhattisgarh',
+    'kerala': 'kerala',
+    'madhya pradesh': 'madhya pradesh',
+    'west bengal': 'west bengal',
+    'nagaland': 'nagaland',
+    'gujarat': 'gujarat',
+    'uttarakhand': 'uttarakhand',
+    'bihar': 'bihar',
+    'jammu & kashmir': 'jammu & kashmir',
+    'himachal pradesh': 'himachal pradesh',
+    'manipur': 'manipur',
+    'goa': 'goa',
+    'meghalaya': 'meghalaya',
+    'tripura': 'tripura',
+    'ladakh': 'ladakh',
+    'dadra and nagar': 'dadra and nagar haveli',
+    'sikkim': 'sikkim',
+    'andaman & nicobar': 'andaman & nicobar islands',
+    'mizoram': 'mizoram',
+    'lakshadweep': 'lakshadweep',
+    
+    # Special codes (not actual states)
+    'apo': 'apo',  # Army Post Office
+    'nl': 'nl'     # Unclear - might be a code or error
+}
+
+# Create a comprehensive mapping for all city variations
+CITY_MAPPING = {
+    # Mumbai variations
+    'mumbai': 'mumbai',
+    'mumbai 400101': 'mumbai',
+    'mumbai dadar  west': 'mumbai',
+    'mumbai dadar west': 'mumbai',
+    'mumbai,malad west,malvani.': 'mumbai',
+    'mumbai 400023': 'mumbai',
+    'mumbai-400064': 'mumbai',
+    'mumbai -400064': 'mumbai',
+    'mumbai 400057': 'mumbai',
+    'kalachowki mumbai': 'mumbai',
+    'kandivali (e), mumbai': 'mumbai',
+    'andheri east, mumbai': 'mumbai',
+    'andheri': 'mumbai',
+    
+    # Bangalore variations
+    'bengaluru': 'bengaluru',
+    'bangalore': 'bengaluru',
+    'bangalore, karnataka': 'bengaluru',
+    'bangalore north': 'bengaluru',
+    'mahadevapura, bangalore': 'bengaluru',
+    'banaswadi, bengaluru': 'bengaluru',
+    
+    # Navi Mumbai variations
+    'navi mumbai': 'navi mumbai',
+    'navi mumbai,': 'navi mumbai',
+    'navi mumbai,thane': 'navi mumbai',
+    
+    # Delhi variations
+    'new delhi': 'delhi',
+    'delhi': 'delhi',
+    'new delhi-110075': 'delhi',
+    'new delhihbjo': 'delhi',
+    'joshi road karol bagh new delhi': 'delhi',
+    
+    # Gurgaon/Gurugram
+    'gurgaon': 'gurugram',
+    'gurugram': 'gurugram',
+    
+    # Lucknow
+    'lucknow': 'lucknow',
+    'lucknowlucknow': 'lucknow',
+    
+    # Chandigarh
+    'chandigarh': 'chandigarh',
+    'chandigar': 'chandigarh',
+    
+    # Puducherry/Pondicherry
+    'puducherry': 'puducherry',
+    'pondycherry': 'puducherry',
+    
+    # Dombivali variations
+    'dombivali  east': 'dombivli',
+    'dombivali east': 'dombivli',
+    'dombivli west': 'dombivli',
+    'dombivli(e)': 'dombivli',
+    'dombivli-east': 'dombivli',
+    'dombivli': 'dombivli',
+    'dobiwali': 'dombivli',
+    
+    # Ahmedabad
+    'ahmedabad': 'ahmedabad',
+    'ahemdabad': 'ahmedabad',
+    
+    # Varanasi
+    'varanasi': 'varanasi',
+    'varanas': 'varanasi',
+    
+    # Sriganganagar
+    'sriganganagar': 'sri ganganagar',
+    'sri ganganagar': 'sri ganganagar',
+    
+    # Mysore/Mysuru
+    'mysore': 'mysuru',
+    'mysuru': 'mysuru',
+    
+    # Coochbehar
+    'cooch behar': 'cooch behar',
+    'coochbehar': 'cooch behar',
+    
+    # Muzaffarnagar
+    'muzaffarnagar': 'muzaffarnagar',
+    'muzzafarnagar': 'muzaffarnagar',
+    
+    # Davangere
+    'davangere': 'davangere',
+    'davanagere': 'davangere',
+    
+    # Kanpur
+    'kanpur': 'kanpur',
+    'kanpurkanpur': 'kanpur',
+    
+    # Thiruvananthapuram
+    'thiruvananthapuram': 'thiruvananthapuram',
+    'trivandrum': 'thiruvananthapuram',
+    'venjarammoodu,thiruvananthapuram': 'thiruvananthapuram',
+    
+    # Kochi/Cochin/Ernakulam
+    'kochi': 'kochi',
+    'cochin': 'kochi',
+    'ernakulam': 'ernakulam',  # Keep separate as it's technically different
+    'vaduthala,kochi': 'kochi',
+    'kakkanadu.ernakulam': 'ernakulam',
+    
+    # Udaipur
+    'udaipur': 'udaipur',
+    'udaipurudipur': 'udaipur',
+    
+    # Bettiah
+    'bettiah': 'bettiah',
+    'bettiyah': 'bettiah',
+    
+    # South Goa
+    'south goa': 'south goa',
+    'curtorim,south goa': 'south goa',
+    
+    # North Goa
+    'north goa': 'north goa',
+    
+    # Anantapur
+    'anantapur': 'anantapur',
+    'anantpur': 'anantapur',
+    
+    # Nashik
+    'nashik': 'nashik',
+    'nasik': 'nashik',
+    
+    # Kolkata variations
+    'kolkata': 'kolkata',
+    'kolkata 700034': 'kolkata',
+    'new town, kolkata': 'kolkata',
+    
+    # Thane variations
+    'thane': 'thane',
+    'thane (w)': 'thane',
+    'thane west': 'thane',
+    'kalyan - west, thane': 'thane',
+    
+    # Pimpri Chinchwad
+    'pimpri chinchwad': 'pimpri chinchwad',
+    'pimpri chinchwad pune': 'pimpri chinchwad',
+    'chinchwad ,pune': 'pimpri chinchwad',
+    
+    # Pune variations
+    'pune': 'pune',
+    'wagholi, pune': 'pune',
+    'kondhwa khurd 48 .pune  411048': 'pune',
+    
+    # Greater Noida
+    'greater noida': 'greater noida',
+    'greater noida west': 'greater noida',
+    'noida extension': 'greater noida',
+    
+    # Tirupati
+    'tirupati': 'tirupati',
+    
+    # Goa cities
+    'panaji': 'panaji',
+    'margao': 'margao',
+    'mapusa': 'mapusa',
+    
+    # Hassan
+    'hassan': 'hassan',
+    'hassan (amazon arun)': 'hassan',
+    
+    # Chittoor
+    'chittoor': 'chittoor',
+    'chittoor district': 'chittoor',
+    
+    # Mahabubnagar
+    'mahbubnagar': 'mahabubnagar',
+    'mahabubnagar': 'mahabubnagar',
+    
+    # Hyderabad variations
+    'hyderabad': 'hyderabad',
+    'phanigiri road,chaitanyapuri,hyderabad': 'hyderabad',
+    
+    # Visakhapatnam variations
+    'visakhapatnam': 'visakhapatnam',
+    'sabbavaram,visakhapatnam': 'visakhapatnam',
+    
+    # Raipur
+    'raipur': 'raipur',
+    'new raipur': 'raipur',
+    
+    # Port Blair
+    'port blair': 'port blair',
+    'south andaman': 'port blair',
+    
+    # Ambala
+    'ambala': 'ambala',
+    'ambala cantt': 'ambala',
+    
+    # Jalandhar
+    'jalandhar': 'jalandhar',
+    'jalandhar cant': 'jalandhar',
+    
+    # Nashik/Nasik
+    'nashik': 'nashik',
+    'nasik': 'nashik',
+}
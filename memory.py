@@ -0,0 +1,169 @@
+"""Per-session memory accounting.
+
+Each page render records the size of the frames it builds (`track`),
+the sizes of the process-wide caches, and the RSS before, after and at the
+peak of the render. When the frames of one render exceed
+SESSION_MEMORY_BUDGET_MB the session logs a warning and switches to the
+low-memory data path for the rest of its life.
+"""
+import logging
+import os
+import resource
+import sys
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger(__name__)
+
+# Frames one render may build before the session falls back; 0 disables the budget
+SESSION_MEMORY_BUDGET_MB = float(os.environ.get('SESSION_MEMORY_BUDGET_MB', '256'))
+# Show the last render's breakdown in the sidebar
+SHOW_MEMORY_STATS = os.environ.get('SHOW_MEMORY_STATS') == '1'
+RSS_SAMPLE_SECONDS = 0.02
+
+# Name -> function returning the bytes held by a process-wide cached object
+_cached_objects = {}
+
+
+def deep_size(obj):
+    """Bytes held by a frame, series or a dict/list of them, including string payloads"""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(deep_size(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(deep_size(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+def string_bytes_per_row(df):
+    """Bytes each row of df holds beyond its shallow memory_usage, mostly string payloads"""
+    return (deep_size(df) - int(df.memory_usage(index=True).sum())) / max(len(df), 1)
+
+
+def estimated_size(df, string_bytes):
+    """deep_size(df) from its shallow size and a measured string_bytes_per_row, without scanning the strings"""
+    return int(df.memory_usage(index=True).sum() + string_bytes * len(df))
+
+
+def current_rss_mb():
+    """Resident set size of this process right now"""
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * resource.getpagesize() / 2**20
+
+
+def peak_rss_mb():
+    """Highest resident set size this process has reached (Linux reports KiB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _in_session():
+    # Prefetch workers and command-line tools run without a session
+    return get_script_run_ctx(suppress_warning=True) is not None
+
+
+def track(name, obj, size_fn=deep_size):
+    """Add size_fn(obj) to the current render's record and return obj unchanged.
+
+    deep_size scans every string of object columns; pass a cheaper size_fn
+    for frames the session builds on every rerun.
+    """
+    if _in_session():
+        frames = st.session_state.setdefault('memory_frames', {})
+        frames[name] = frames.get(name, 0) + size_fn(obj)
+    return obj
+
+
+def register_cached(name, size_fn):
+    """Report a process-wide cached object alongside the st.cache_data caches"""
+    _cached_objects[name] = size_fn
+
+
+def cached_sizes():
+    """Bytes held by each st.cache_data function and each registered cached object"""
+    sizes = {}
+    try:
+        from streamlit.runtime.caching.cache_data_api import get_data_cache_stats_provider
+        for stats in get_data_cache_stats_provider().get_stats().values():
+            for stat in stats:
+                key = f"st.cache_data: {stat.cache_name}"
+                sizes[key] = sizes.get(key, 0) + stat.byte_length
+    except (ImportError, AttributeError):
+        # Internal Streamlit API; our own caches are still reported below
+        pass
+    for name, size_fn in _cached_objects.items():
+        sizes[name] = size_fn()
+    return sizes
+
+
+def low_memory_mode():
+    """True once this session has gone over its memory budget"""
+    return _in_session() and st.session_state.get('low_memory', False)
+
+
+@contextmanager
+def measure_render(page):
+    """Account for the frames and RSS of one page render and enforce the budget"""
+    st.session_state.memory_frames = {}
+    rss_before = current_rss_mb()
+    rss_peak = [rss_before]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(RSS_SAMPLE_SECONDS):
+            rss_peak[0] = max(rss_peak[0], current_rss_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        sampler.join()
+        rss_after = current_rss_mb()
+        frames = st.session_state.memory_frames
+        frames_mb = sum(frames.values()) / 2**20
+        st.session_state.memory_report = {
+            'page': page,
+            'frames_mb': frames_mb,
+            'frames': {name: size / 2**20 for name, size in frames.items()},
+            'rss_before_mb': rss_before,
+            'rss_after_mb': rss_after,
+            # RSS is per process, so concurrent sessions show up here too
+            'rss_peak_mb': max(rss_peak[0], rss_after),
+        }
+        logger.debug("%s: %.1f MB of frames, peak RSS %.1f MB", page, frames_mb, rss_peak[0])
+
+        if SESSION_MEMORY_BUDGET_MB and frames_mb > SESSION_MEMORY_BUDGET_MB:
+            if not st.session_state.get('low_memory', False):
+                logger.warning(
+                    "%s built %.1f MB of frames, over the %.0f MB session budget: "
+                    "switching this session to the low-memory data path (%s)",
+                    page, frames_mb, SESSION_MEMORY_BUDGET_MB,
+                    ', '.join(f"{name} {size / 2**20:.1f} MB" for name, size in frames.items())
+                )
+            st.session_state.low_memory = True
+
+
+def show_memory_stats():
+    """Sidebar breakdown of the last render, enabled with SHOW_MEMORY_STATS=1"""
+    report = st.session_state.get('memory_report')
+    if not SHOW_MEMORY_STATS or report is None:
+        return
+    with st.sidebar.expander("Memory"):
+        st.write(f"**{report['page']}**: {report['frames_mb']:.1f} MB of frames"
+                 + (" (low-memory mode)" if st.session_state.get('low_memory') else ""))
+        for name, size in report['frames'].items():
+            st.write(f"- {name}: {size:.1f} MB")
+        st.write(f"RSS: {report['rss_before_mb']:.0f} → {report['rss_after_mb']:.0f} MB, "
+                 f"peak {report['rss_peak_mb']:.0f} MB")
+        st.write("**Caches**")
+        for name, size in cached_sizes().items():
+            st.write(f"- {name}: {size / 2**20:.1f} MB")
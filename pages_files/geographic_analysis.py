@@ -1,19 +1,59 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils import load_data, apply_filters
+from utils import load_filtered, current_filters, track_rows
+from aggregates import geographic_metrics, top_cities
+from prefetch import get_page_aggregates
 
-def show_geographic_analysis():
-    # Load data
-    df = load_data()
+def geographic_figures(aggs):
+    """Build the Geographic page charts from its aggregates"""
+    # Top states by revenue
+    sales_per_state = aggs['sales_per_state']
+    top_states_fig = px.bar(sales_per_state.head(15).reset_index(), 
+                            x='Total_Revenue', y='ship_state',
+                            orientation='h', title="Top 15 States by Revenue",
+                            color='Total_Revenue', color_continuous_scale='Viridis')
+    top_states_fig.update_layout(height=500)
+    
+    # State order volume vs revenue scatter
+    scatter_fig = px.scatter(sales_per_state.reset_index(), 
+                             x='Total_Orders', y='Total_Revenue',
+                             size='Total_Quantity', color='Avg_Order_Value',
+                             hover_data=['ship_state'], title="Orders vs Revenue by State",
+                             color_continuous_scale='Blues')
+    scatter_fig.update_layout(height=500)
+    
+    # Overall top cities
+    cities_fig = px.bar(aggs['top_cities'].reset_index(), x='ship_city', y='Revenue',
+                        title="Top 20 Cities by Revenue",
+                        color='Revenue', color_continuous_scale='Oranges')
+    cities_fig.update_xaxes(tickangle=-45)
     
-    # Apply global filters
-    filtered_df_global = apply_filters(
-        df,
-        st.session_state.selected_state,
-        st.session_state.selected_month,
-        st.session_state.selected_day
-    )
+    # B2B vs B2C by state
+    customer_fig = px.bar(aggs['state_customer'].reset_index(), x='ship_state', 
+                          y=['B2B', 'B2C'], title="B2B vs B2C Orders by Top 10 States",
+                          barmode='stack')
+    customer_fig.update_layout(height=400)
+    
+    # Delivery success by state
+    state_delivery = aggs['state_delivery']
+    delivery_fig = px.bar(x=state_delivery.index, y=state_delivery.values,
+                          title="Delivery Success Rate by State (Top 15)",
+                          labels={'y': 'Success Rate (%)', 'x': 'State'})
+    delivery_fig.update_layout(height=400)
+    delivery_fig.update_xaxes(tickangle=-45)
+    
+    return {
+        'Top 15 States by Revenue': top_states_fig,
+        'Orders vs Revenue by State': scatter_fig,
+        'Top 20 Cities by Revenue': cities_fig,
+        'B2B vs B2C Orders by Top 10 States': customer_fig,
+        'Delivery Success Rate by State (Top 15)': delivery_fig,
+    }
+
+def show_geographic_analysis():
+    # Aggregates for the global filters, usually warm from the prefetch pool
+    aggs = get_page_aggregates('geographic')
     
     # Display active filters
     if (st.session_state.selected_state != 'All' or 
@@ -28,68 +68,43 @@ def show_geographic_analysis():
     # Additional state filter for this page
     col1, col2 = st.columns([3, 1])
     with col1:
-        available_states = sorted(filtered_df_global['ship_state'].unique().tolist())
+        available_states = aggs['available_states']
         selected_state = st.selectbox("Filter by specific state", ['All'] + available_states)
     
     if selected_state != 'All':
-        page_filtered_df = filtered_df_global[filtered_df_global['ship_state'] == selected_state]
+        filtered_df_global = load_filtered(*current_filters())
+        page_filtered_df = track_rows('state rows', filtered_df_global[filtered_df_global['ship_state'] == selected_state])
+        metrics = geographic_metrics(page_filtered_df)
     else:
-        page_filtered_df = filtered_df_global
+        metrics = aggs['metrics']
     
     # Key metrics for selected area
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Orders", f"{len(page_filtered_df):,}")
+        st.metric("Orders", f"{metrics['orders']:,}")
     with col2:
-        st.metric("Revenue", f"₹{page_filtered_df['total_revenue'].sum():,.0f}")
+        st.metric("Revenue", f"₹{metrics['revenue']:,.0f}")
     with col3:
-        st.metric("Avg Order Value", f"₹{page_filtered_df['amount'].mean():.2f}")
+        st.metric("Avg Order Value", f"₹{metrics['avg_order_value']:.2f}")
     with col4:
-        st.metric("Cities Served", f"{page_filtered_df['ship_city'].nunique()}")
+        st.metric("Cities Served", f"{metrics['cities']}")
     
     # Visualizations
+    figs = geographic_figures(aggs)
     tab1, tab2, tab3 = st.tabs(["State Performance", "City Analysis", "Regional Insights"])
     
     with tab1:
         col1, col2 = st.columns(2)
         
         with col1:
-            # Top states by revenue
-            sales_per_state = filtered_df_global.groupby('ship_state').agg({
-                'order_id': 'count',
-                'total_revenue': 'sum',
-                'amount': 'mean',
-                'Quantity': 'sum'
-            }).round(2)
-            sales_per_state.columns = ['Total_Orders', 'Total_Revenue', 'Avg_Order_Value', 'Total_Quantity']
-            sales_per_state = sales_per_state.sort_values('Total_Revenue', ascending=False)
-            
-            fig = px.bar(sales_per_state.head(15).reset_index(), 
-                        x='Total_Revenue', y='ship_state',
-                        orientation='h', title="Top 15 States by Revenue",
-                        color='Total_Revenue', color_continuous_scale='Viridis')
-            fig.update_layout(height=500)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(figs['Top 15 States by Revenue'], use_container_width=True)
         
         with col2:
-            # State order volume vs revenue scatter
-            fig = px.scatter(sales_per_state.reset_index(), 
-                           x='Total_Orders', y='Total_Revenue',
-                           size='Total_Quantity', color='Avg_Order_Value',
-                           hover_data=['ship_state'], title="Orders vs Revenue by State",
-                           color_continuous_scale='Blues')
-            fig.update_layout(height=500)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(figs['Orders vs Revenue by State'], use_container_width=True)
     
     with tab2:
         if selected_state != 'All':
-            city_data = page_filtered_df.groupby('ship_city').agg({
-                'order_id': 'count',
-                'total_revenue': 'sum',
-                'amount': 'mean'
-            }).round(2)
-            city_data.columns = ['Orders', 'Revenue', 'Avg_Order_Value']
-            city_data = city_data.sort_values('Revenue', ascending=False).head(10)
+            city_data = top_cities(page_filtered_df, 10, with_aov=True)
             
             fig = px.bar(city_data.reset_index(), x='ship_city', y='Revenue',
                         title=f"Top 10 Cities in {selected_state}",
@@ -97,44 +112,14 @@ def show_geographic_analysis():
             st.plotly_chart(fig, use_container_width=True)
         else:
             # Overall top cities
-            city_data = filtered_df_global.groupby('ship_city').agg({
-                'order_id': 'count',
-                'total_revenue': 'sum'
-            }).round(2)
-            city_data.columns = ['Orders', 'Revenue']
-            top_cities = city_data.sort_values('Revenue', ascending=False).head(20)
-            
-            fig = px.bar(top_cities.reset_index(), x='ship_city', y='Revenue',
-                        title="Top 20 Cities by Revenue",
-                        color='Revenue', color_continuous_scale='Oranges')
-            fig.update_xaxes(tickangle=-45)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(figs['Top 20 Cities by Revenue'], use_container_width=True)
     
     with tab3:
         # Regional insights
         col1, col2 = st.columns(2)
         
         with col1:
-            # B2B vs B2C by state
-            state_customer = filtered_df_global.groupby(['ship_state', 'customer_type']).size().unstack(fill_value=0)
-            state_customer = state_customer.loc[state_customer.sum(axis=1).nlargest(10).index]
-            
-            fig = px.bar(state_customer.reset_index(), x='ship_state', 
-                        y=['B2B', 'B2C'], title="B2B vs B2C Orders by Top 10 States",
-                        barmode='stack')
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(figs['B2B vs B2C Orders by Top 10 States'], use_container_width=True)
         
         with col2:
-            # Delivery success by state
-            delivery_success = filtered_df_global[filtered_df_global['status'].str.contains('Delivered', na=False)]
-            state_delivery = (delivery_success.groupby('ship_state').size() / 
-                            filtered_df_global.groupby('ship_state').size() * 100).round(2)
-            state_delivery = state_delivery.nlargest(15)
-            
-            fig = px.bar(x=state_delivery.index, y=state_delivery.values,
-                        title="Delivery Success Rate by State (Top 15)",
-                        labels={'y': 'Success Rate (%)', 'x': 'State'})
-            fig.update_layout(height=400)
-            fig.update_xaxes(tickangle=-45)
-            st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+            st.plotly_chart(figs['Delivery Success Rate by State (Top 15)'], use_container_width=True)
\ No newline at end of file
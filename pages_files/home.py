@@ -1,11 +1,35 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils import load_data, apply_filters
+from utils import filter_options
+from prefetch import prefetch_pages, get_page_aggregates
+
+def home_figures(aggs):
+    """Build the Home page charts from its aggregates"""
+    top_states = aggs['top_states']
+    top_states_fig = px.bar(top_states.reset_index(), x='ship_state', y='Total_Revenue',
+                            color='Total_Revenue', color_continuous_scale='Blues')
+    top_states_fig.update_layout(showlegend=False, height=300)
+
+    top_categories = aggs['top_categories']
+    top_categories_fig = px.bar(x=top_categories.index, y=top_categories.values,
+                                color=top_categories.values, color_continuous_scale='Greens')
+    top_categories_fig.update_layout(showlegend=False, height=300)
+
+    status_dist = aggs['status_dist']
+    status_fig = px.pie(values=status_dist.values, names=status_dist.index,
+                        color_discrete_sequence=px.colors.qualitative.Set3)
+    status_fig.update_layout(showlegend=True, height=300)
+
+    return {
+        'Top 5 States by Revenue': top_states_fig,
+        'Top 5 Categories by Revenue': top_categories_fig,
+        'Order Status Distribution': status_fig,
+    }
 
 def show_home_page():
-    # Load data
-    df = load_data()
+    # Filter choices come from the catalog or a cached scan, not a full load
+    all_states, all_months, available_days = filter_options()
     
     # Global filters section
     st.header("🔍 Global Filters")
@@ -14,7 +38,6 @@ def show_home_page():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        all_states = sorted(df['ship_state'].unique().tolist())
         state_options = ['All'] + all_states
         selected_state = st.selectbox(
             "Select State",
@@ -24,7 +47,6 @@ def show_home_page():
         st.session_state.selected_state = selected_state
     
     with col2:
-        all_months = sorted(df['month_name'].unique().tolist())
         month_options = ['All'] + all_months
         selected_month = st.selectbox(
             "Select Month",
@@ -36,7 +58,6 @@ def show_home_page():
     with col3:
         weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         day_options = ['All'] + weekday_order
-        available_days = sorted(df['day_of_week'].unique().tolist())
         day_options_filtered = ['All'] + [day for day in weekday_order if day in available_days]
         selected_day = st.selectbox(
             "Select Day",
@@ -45,13 +66,10 @@ def show_home_page():
         )
         st.session_state.selected_day = selected_day
     
-    # Apply filters
-    filtered_df = apply_filters(
-        df,
-        st.session_state.selected_state,
-        st.session_state.selected_month,
-        st.session_state.selected_day
-    )
+    # Warm the other pages for the new filters, then aggregate this one
+    prefetch_pages()
+    aggs = get_page_aggregates('home')
+    figs = home_figures(aggs)
     
     # Display active filters
     if (st.session_state.selected_state != 'All' or 
@@ -70,13 +88,13 @@ def show_home_page():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Orders", f"{len(filtered_df):,}")
+        st.metric("Total Orders", f"{aggs['total_orders']:,}")
     with col2:
-        st.metric("Total Revenue", f"₹{filtered_df['total_revenue'].sum():,.0f}")
+        st.metric("Total Revenue", f"₹{aggs['total_revenue']:,.0f}")
     with col3:
-        st.metric("Average Order Value", f"₹{filtered_df['amount'].mean():.2f}")
+        st.metric("Average Order Value", f"₹{aggs['avg_order_value']:.2f}")
     with col4:
-        st.metric("Total Products Sold", f"{filtered_df['Quantity'].sum():,}")
+        st.metric("Total Products Sold", f"{aggs['total_quantity']:,}")
     
     st.markdown("---")
     
@@ -86,11 +104,11 @@ def show_home_page():
     
     with col1:
         st.subheader("Data Summary")
-        st.write(f"- **Date Range**: {filtered_df['date'].min().strftime('%B %d, %Y')} to {filtered_df['date'].max().strftime('%B %d, %Y')}")
-        st.write(f"- **Number of Records**: {len(filtered_df):,}")
-        st.write(f"- **Number of Categories**: {filtered_df['category'].nunique()}")
-        st.write(f"- **Number of States**: {filtered_df['ship_state'].nunique()}")
-        st.write(f"- **Number of Cities**: {filtered_df['ship_city'].nunique()}")
+        st.write(f"- **Date Range**: {aggs['date_min'].strftime('%B %d, %Y')} to {aggs['date_max'].strftime('%B %d, %Y')}")
+        st.write(f"- **Number of Records**: {aggs['total_orders']:,}")
+        st.write(f"- **Number of Categories**: {aggs['n_categories']}")
+        st.write(f"- **Number of States**: {aggs['n_states']}")
+        st.write(f"- **Number of Cities**: {aggs['n_cities']}")
     
     with col2:
         st.subheader("Key Features")
@@ -105,35 +123,13 @@ def show_home_page():
     col1, col2 = st.columns(2)  # Fixed: was incorrectly creating single columns
     
     with col1:
-        # Calculate sales_per_state dynamically
-        sales_per_state = filtered_df.groupby('ship_state').agg({
-            'order_id': 'count',
-            'total_revenue': 'sum',
-            'amount': 'mean',
-            'Quantity': 'sum'
-        }).round(2)
-        sales_per_state.columns = ['Total_Orders', 'Total_Revenue', 'Avg_Order_Value', 'Total_Quantity']
-        sales_per_state = sales_per_state.sort_values('Total_Revenue', ascending=False)
-        
-        top_states = sales_per_state.head(5)
         st.subheader("Top 5 States by Revenue")
-        fig = px.bar(top_states.reset_index(), x='ship_state', y='Total_Revenue',
-                    color='Total_Revenue', color_continuous_scale='Blues')
-        fig.update_layout(showlegend=False, height=300)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figs['Top 5 States by Revenue'], use_container_width=True)
     
     with col2:
-        top_categories = filtered_df.groupby('category')['total_revenue'].sum().sort_values(ascending=False).head(5)
         st.subheader("Top 5 Categories by Revenue")
-        fig = px.bar(x=top_categories.index, y=top_categories.values,
-                    color=top_categories.values, color_continuous_scale='Greens')
-        fig.update_layout(showlegend=False, height=300)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figs['Top 5 Categories by Revenue'], use_container_width=True)
     
 
     st.subheader("Order Status Distribution")
-    status_dist = filtered_df['status'].value_counts()
-    fig = px.pie(values=status_dist.values, names=status_dist.index,
-                color_discrete_sequence=px.colors.qualitative.Set3)
-    fig.update_layout(showlegend=True, height=300)
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    st.plotly_chart(figs['Order Status Distribution'], use_container_width=True)
\ No newline at end of file
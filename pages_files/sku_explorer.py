@@ -0,0 +1,116 @@
+import streamlit as st
+import numpy as np
+from utils import load_filtered, current_filters, data_version
+from aggregates import sku_summary
+from id_codec import decode_ids
+
+SORT_COLUMNS = {
+    'Revenue': 'revenue',
+    'Quantity': 'quantity',
+    'Orders': 'orders',
+    'Cancellation Rate': 'cancellation_rate',
+}
+PAGE_SIZES = [25, 50, 100]
+
+# Summaries and sort orders are shared read-only between sessions
+# (st.cache_resource), so a rerun never copies or pickles the full table.
+# version is utils.data_version(), so rewritten data is summarized again
+@st.cache_resource(max_entries=32)
+def cached_summary(level, filters, version):
+    """SKU or style summary for one set of global filters"""
+    return sku_summary(load_filtered(*filters, version=version), level)
+
+@st.cache_resource(max_entries=32)
+def cached_categories(level, filters, version):
+    return ['All'] + sorted(cached_summary(level, filters, version)['category'].unique().tolist())
+
+@st.cache_resource(max_entries=64)
+def cached_order(level, filters, version, search, category, sort_by, descending):
+    """Row positions of the summary matching search and category, in display order"""
+    summary = cached_summary(level, filters, version)
+    mask = np.ones(len(summary), dtype=bool)
+    if search:
+        mask &= summary.index.str.contains(search, case=False, regex=False)
+    if category != 'All':
+        mask &= (summary['category'] == category).to_numpy()
+    positions = np.flatnonzero(mask)
+    order = np.argsort(summary[SORT_COLUMNS[sort_by]].to_numpy()[positions], kind='stable')
+    return positions[order[::-1] if descending else order]
+
+def size_mix(shares, top=3):
+    """'M 40%, L 35%, XL 25%' for each row of size shares"""
+    sizes = [column.removeprefix('size_') for column in shares.columns]
+    values = shares.to_numpy()
+    ranked = np.argsort(-values, axis=1, kind='stable')[:, :top]
+    return [
+        ', '.join(f"{sizes[i]} {row[i]:.0%}" for i in idx if row[i] > 0)
+        for row, idx in zip(values, ranked)
+    ]
+
+def page_rows(summary, positions):
+    """The visible rows only, formatted for display"""
+    rows = summary.iloc[positions]
+    size_columns = [c for c in rows.columns if c.startswith('size_')]
+    view = decode_ids(rows.drop(columns=size_columns).reset_index())
+    view['Size Mix'] = size_mix(rows[size_columns])
+    return view.rename(columns={
+        'sku': 'SKU', 'style': 'Style', 'category': 'Category', 'orders': 'Orders', 'quantity': 'Quantity',
+        'revenue': 'Revenue (₹)', 'cancellation_rate': 'Cancellation Rate (%)',
+    })
+
+def show_sku_explorer():
+    filters = current_filters()
+    version = data_version()
+
+    # Display active filters
+    if (st.session_state.selected_state != 'All' or
+        st.session_state.selected_month != 'All' or
+        st.session_state.selected_day != 'All'):
+        st.info(
+            f"Active Filters - State: {st.session_state.selected_state} | "
+            f"Month: {st.session_state.selected_month} | "
+            f"Day: {st.session_state.selected_day}"
+        )
+
+    # Filters
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        level = 'sku' if st.radio("Group by", ['SKU', 'Style'], horizontal=True) == 'SKU' else 'style'
+    with col2:
+        search = st.text_input("Search", key='sku_search').strip()
+    with col3:
+        selected_category = st.selectbox("Select Category", cached_categories(level, filters, version))
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sort_by = st.selectbox("Sort by", list(SORT_COLUMNS))
+    with col2:
+        descending = st.selectbox("Order", ['Descending', 'Ascending']) == 'Descending'
+    with col3:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES)
+
+    positions = cached_order(level, filters, version, search, selected_category, sort_by, descending)
+    n_pages = max(1, -(-len(positions) // page_size))
+    with col4:
+        # Keyed on everything that changes the result set, so a new one starts again at page 1
+        page_key = f"sku_page:{level}:{filters}:{search}:{selected_category}:{sort_by}:{descending}:{page_size}"
+        page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1, key=page_key)
+
+    if len(positions) == 0:
+        st.info("No data available for the selected filters")
+        return
+
+    summary = cached_summary(level, filters, version)
+    start = (page - 1) * page_size
+    visible = positions[start:start + page_size]
+    st.caption(f"Showing {start + 1:,}–{start + len(visible):,} of {len(positions):,} "
+               f"{'SKUs' if level == 'sku' else 'styles'} (page {page} of {n_pages})")
+    st.dataframe(
+        page_rows(summary, visible),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Revenue (₹)': st.column_config.NumberColumn(format="%.0f"),
+            'Cancellation Rate (%)': st.column_config.NumberColumn(format="%.1f"),
+        },
+    )
@@ -0,0 +1,186 @@
+"""Hive-style partitioned copy of the cleaned data.
+
+Layout: data/partitioned/layout-<ns>/month_name=<month>/ship_state=<state>/part-0.parquet,
+plus a _catalog.json listing every partition of the current layout, so a
+reader can prune on the global month/state filters before touching any file.
+Every write goes to a new layout directory and switches the catalog over
+with one atomic rename; files of a layout are never rewritten in place.
+
+Build it with:  python partitions.py
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from urllib.parse import quote
+
+import pandas as pd
+
+PARTITION_ROOT = 'data/partitioned'
+PARTITION_COLUMNS = ['month_name', 'ship_state']
+CATALOG_FILE = '_catalog.json'
+LAYOUT_PREFIX = 'layout-'
+
+
+def partition_dir(month, state):
+    """Relative directory of one partition; values are quoted like Hive does"""
+    return os.path.join(f"month_name={quote(month, safe='')}", f"ship_state={quote(state, safe='')}")
+
+
+def has_partitions(root=PARTITION_ROOT):
+    """True when a partitioned copy has been written under root"""
+    return os.path.exists(os.path.join(root, CATALOG_FILE))
+
+
+def write_partitions(df, root=PARTITION_ROOT):
+    """Split the cleaned frame into one parquet file per month and state.
+
+    The files go to a fresh layout directory that no reader knows about
+    until the catalog is atomically replaced. The previous layout is kept
+    for readers that started on it; older ones are deleted.
+    """
+    layout = f"{LAYOUT_PREFIX}{time.time_ns()}"
+    catalog = {
+        'layout': layout,
+        'content_hash': content_hash(df),
+        'columns': df.columns.tolist(),
+        'days': sorted(df['day_of_week'].unique().tolist()),
+        'partitions': [],
+    }
+    for (month, state), part in df.groupby(PARTITION_COLUMNS, sort=True):
+        path = os.path.join(layout, partition_dir(month, state), 'part-0.parquet')
+        os.makedirs(os.path.join(root, os.path.dirname(path)), exist_ok=True)
+        # The partition values live in the path, not in the file
+        part.drop(columns=PARTITION_COLUMNS).to_parquet(os.path.join(root, path), index=False)
+        catalog['partitions'].append({'month_name': month, 'ship_state': state, 'rows': len(part), 'path': path})
+
+    previous = read_catalog(root).get('layout') if has_partitions(root) else None
+    tmp_catalog = os.path.join(root, CATALOG_FILE + '.tmp')
+    with open(tmp_catalog, 'w') as f:
+        json.dump(catalog, f, indent=1)
+    os.replace(tmp_catalog, os.path.join(root, CATALOG_FILE))
+
+    for name in os.listdir(root):
+        if name not in (CATALOG_FILE, layout, previous):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return catalog
+
+
+def content_hash(df):
+    """Hash of df's column names, dtypes and values; the same data always hashes the same"""
+    h = hashlib.sha256(json.dumps([df.columns.tolist(), df.dtypes.astype(str).tolist()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()[:16]
+
+
+def catalog_version(root=PARTITION_ROOT):
+    """Content hash of the current layout's data, unchanged when identical data is written again"""
+    catalog = read_catalog(root)
+    if 'content_hash' in catalog:
+        return catalog['content_hash']
+    # Layouts written before content hashes were recorded
+    return hashlib.sha256(json.dumps(catalog, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def read_catalog(root=PARTITION_ROOT):
+    with open(os.path.join(root, CATALOG_FILE)) as f:
+        return json.load(f)
+
+
+def prune(catalog, state='All', month='All'):
+    """Catalog entries that can hold rows for the state and month filters"""
+    return [
+        entry for entry in catalog['partitions']
+        if (state == 'All' or entry['ship_state'] == state)
+        and (month == 'All' or entry['month_name'] == month)
+    ]
+
+
+def read_partition(root, entry, columns):
+    """Read one partition file and put its partition columns back"""
+    part = pd.read_parquet(os.path.join(root, entry['path']))
+    part['month_name'] = entry['month_name']
+    part['ship_state'] = entry['ship_state']
+    return part[columns]
+
+
+def combine_partitions(parts, day='All'):
+    """Concatenate partitions and apply the day filter, which is not a partition key"""
+    df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0].copy()
+    if day != 'All':
+        df = df[df['day_of_week'] == day].reset_index(drop=True)
+    return df
+
+
+def read_partitions(state='All', month='All', day='All', root=PARTITION_ROOT):
+    """Read only the partitions matching the filters, keeping nothing in memory"""
+    catalog = read_catalog(root)
+    entries = prune(catalog, state, month)
+    if not entries:
+        # Keep the schema so pages can still use .dt and .cat accessors
+        return read_partition(root, catalog['partitions'][0], catalog['columns']).iloc[:0]
+    return combine_partitions([read_partition(root, e, catalog['columns']) for e in entries], day)
+
+
+class LazyPartitionedDataset:
+    """Partitioned dataset that reads each partition on first access and keeps it.
+
+    Memory grows with the slices users actually look at instead of the full
+    history; a process that only ever serves one state never reads the rest.
+    """
+
+    def __init__(self, root=PARTITION_ROOT):
+        self.root = root
+        self.catalog = read_catalog(root)
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def partition(self, entry):
+        with self._lock:
+            part = self._loaded.get(entry['path'])
+        if part is None:
+            part = self._read(entry)
+            with self._lock:
+                part = self._loaded.setdefault(entry['path'], part)
+        return part
+
+    def _read(self, entry):
+        try:
+            return read_partition(self.root, entry, self.catalog['columns'])
+        except FileNotFoundError:
+            # Identical data written again keeps this dataset's version but
+            # moves it to a new layout; read the partition from there
+            catalog = read_catalog(self.root)
+            if catalog.get('content_hash') is None or catalog.get('content_hash') != self.catalog.get('content_hash'):
+                raise
+            current = next(e for e in catalog['partitions']
+                           if (e['month_name'], e['ship_state']) == (entry['month_name'], entry['ship_state']))
+            return read_partition(self.root, current, catalog['columns'])
+
+    def filtered(self, state='All', month='All', day='All'):
+        """Rows matching the filters, reading any partitions not loaded yet"""
+        entries = prune(self.catalog, state, month)
+        if not entries:
+            return self.partition(self.catalog['partitions'][0]).iloc[:0].copy()
+        return combine_partitions([self.partition(e) for e in entries], day)
+
+    @property
+    def loaded_partitions(self):
+        return len(self._loaded)
+
+    @property
+    def memory_bytes(self):
+        with self._lock:
+            parts = list(self._loaded.values())
+        return sum(int(part.memory_usage(deep=True).sum()) for part in parts)
+
+
+if __name__ == '__main__':
+    from utils import read_cleaned_data
+
+    root = sys.argv[1] if len(sys.argv) > 1 else PARTITION_ROOT
+    catalog = write_partitions(read_cleaned_data(), root)
+    print(f"Wrote {len(catalog['partitions'])} partitions to {root}")
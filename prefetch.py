@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from aggregates import PAGE_AGGREGATES, compute_page_aggregates
+from utils import current_filters, data_version
+from memory import deep_size, register_cached, track
+
+# Share of the machine's cores the background workers may keep busy
+PREFETCH_CPU_BUDGET = float(os.environ.get('PREFETCH_CPU_BUDGET', '0.5'))
+# Number of (page, filters) results kept warm across all sessions
+PREFETCH_MAX_RESULTS = int(os.environ.get('PREFETCH_MAX_RESULTS', '128'))
+# Seconds without a rerun after which a session counts as closed
+PREFETCH_SESSION_TTL = float(os.environ.get('PREFETCH_SESSION_TTL', '600'))
+
+
+class PrefetchPool:
+    """Background workers that compute page aggregates before the user navigates.
+
+    Jobs and results are keyed by (page, filters), so sessions that pick the
+    same global filters share one computation. Queued jobs are cancelled once
+    no session wants their filters any more, including sessions that have
+    not been seen for session_ttl seconds and are taken to be closed. When
+    the data on disk changes, everything computed from the old copy is dropped.
+    """
+
+    def __init__(self, cpu_budget=PREFETCH_CPU_BUDGET, max_results=PREFETCH_MAX_RESULTS,
+                 session_ttl=PREFETCH_SESSION_TTL):
+        workers = max(1, int((os.cpu_count() or 1) * cpu_budget))
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch')
+        self._lock = threading.RLock()
+        self._max_results = max_results
+        self._session_ttl = session_ttl
+        self._data = None  # utils.data_version() the results and jobs belong to
+        self._results = OrderedDict()  # (page, filters) -> aggregates, least recently used first
+        self._pending = {}  # (page, filters) -> Future
+        self._interest = {}  # filters -> ids of the sessions currently on them
+        self._session_filters = {}  # session id -> filters last scheduled for it
+        self._last_seen = {}  # session id -> time.monotonic() of its last call
+        self.stats = {'hits': 0, 'waits': 0, 'misses': 0, 'cancelled': 0, 'preempted': 0}
+
+    def schedule(self, session_id, filters):
+        """Queue every page for filters, releasing the session's previous filters"""
+        data = data_version()
+        with self._lock:
+            self._sweep(session_id)
+            self._use_data(data)
+            previous = self._session_filters.get(session_id)
+            if previous == filters:
+                return
+            self._session_filters[session_id] = filters
+            if previous is not None:
+                self._release(session_id, previous)
+            self._interest.setdefault(filters, set()).add(session_id)
+
+            for page in PAGE_AGGREGATES:
+                key = (page, filters)
+                if key in self._results or key in self._pending:
+                    continue
+                future = self._executor.submit(compute_page_aggregates, page, filters, data)
+                self._pending[key] = future
+                future.add_done_callback(lambda f, key=key, data=data: self._store(key, data, f))
+
+    def get(self, page, filters, session_id=None):
+        """Return warm aggregates, wait for a job already running, or compute them now"""
+        key = (page, filters)
+        data = data_version()
+        with self._lock:
+            if session_id is not None:
+                self._last_seen[session_id] = time.monotonic()
+            self._use_data(data)
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._results[key]
+            future = self._pending.get(key)
+
+        if future is not None and future.cancel():
+            # Still queued behind speculative jobs; the user is waiting, so
+            # compute it here instead of behind them
+            with self._lock:
+                self.stats['preempted'] += 1
+        elif future is not None:
+            try:
+                result = future.result()
+            except Exception:
+                # Cancelled by another session or failed in the background:
+                # recompute below so errors surface on the page itself
+                pass
+            else:
+                with self._lock:
+                    self.stats['waits'] += 1
+                return result
+
+        result = compute_page_aggregates(page, filters, data)
+        with self._lock:
+            self.stats['misses'] += 1
+            if data == self._data:
+                self._remember(key, result)
+        return result
+
+    def _use_data(self, data):
+        """Drop results and jobs of an older copy of the data; sessions schedule again"""
+        if data == self._data:
+            return
+        self._data = data
+        self._results.clear()
+        pending = list(self._pending.values())
+        self._pending.clear()
+        for future in pending:
+            future.cancel()
+        self._interest.clear()
+        self._session_filters.clear()
+
+    def _sweep(self, session_id):
+        """Mark session_id as seen and forget the sessions idle past the TTL"""
+        now = time.monotonic()
+        self._last_seen[session_id] = now
+        for idle in [s for s, seen in self._last_seen.items() if now - seen > self._session_ttl]:
+            del self._last_seen[idle]
+            filters = self._session_filters.pop(idle, None)
+            if filters is not None:
+                self._release(idle, filters)
+
+    def _release(self, session_id, filters):
+        """Cancel queued jobs for filters once no session is waiting on them"""
+        sessions = self._interest.get(filters, set())
+        sessions.discard(session_id)
+        if sessions:
+            return
+        self._interest.pop(filters, None)
+        for page in PAGE_AGGREGATES:
+            future = self._pending.get((page, filters))
+            if future is not None and future.cancel():
+                self.stats['cancelled'] += 1
+
+    def _store(self, key, data, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            if future.cancelled() or future.exception() is not None or data != self._data:
+                return
+            self._remember(key, future.result())
+
+    def memory_bytes(self):
+        with self._lock:
+            results = list(self._results.values())
+        return deep_size(results)
+
+    def _remember(self, key, result):
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > self._max_results:
+            self._results.popitem(last=False)
+
+
+@st.cache_resource
+def get_prefetch_pool():
+    """Return the pool shared by every session of this process"""
+    pool = PrefetchPool()
+    register_cached('prefetch results', pool.memory_bytes)
+    return pool
+
+
+def _session_id():
+    if 'prefetch_session_id' not in st.session_state:
+        st.session_state.prefetch_session_id = uuid.uuid4().hex
+    return st.session_state.prefetch_session_id
+
+
+def prefetch_pages():
+    """Start warming every page for the session's current global filters"""
+    get_prefetch_pool().schedule(_session_id(), current_filters())
+
+
+def get_page_aggregates(page):
+    """Return one page's aggregates for the session's current global filters"""
+    return track(f'{page} aggregates', get_prefetch_pool().get(page, current_filters(), _session_id()))
@@ -0,0 +1,209 @@
+"""Persistent store for computed page aggregates.
+
+Results live in one SQLite file keyed by dataset version and query. The
+version hashes the data's content, not its file times, so a restarted or
+redeployed dashboard with the same data serves the first views from disk
+instead of recomputing them. WAL mode and a busy timeout let several
+processes on the host read and write the file at once; the least recently
+used results are evicted once the file holds more than RESULT_STORE_MAX_MB.
+Values are pickled, so point RESULT_STORE_PATH only at a file this app owns.
+
+Pre-fill it with the Home page's common filter combinations:
+
+    python result_store.py [--all]
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+
+logger = logging.getLogger(__name__)
+
+# Empty disables the store
+RESULT_STORE_PATH = os.environ.get('RESULT_STORE_PATH', 'data/.result_store.sqlite')
+RESULT_STORE_MAX_MB = float(os.environ.get('RESULT_STORE_MAX_MB', '256'))
+# Seconds a writer waits for another process's transaction before giving up
+BUSY_TIMEOUT = 5
+# Results are computed and unpickled by this code, so a change to it or to
+# the libraries is a new version too
+CODE_FILES = ['aggregates.py', 'id_codec.py', 'partitions.py', 'utils.py']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    value BLOB NOT NULL,
+    bytes INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+
+def _code_version():
+    h = hashlib.sha256(f"pandas {pd.__version__} numpy {np.__version__}".encode())
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in CODE_FILES:
+        with open(os.path.join(here, name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+_CODE_VERSION = _code_version()
+
+
+def dataset_version(data_version):
+    """Identifies the data a result was computed from, as utils.data_version(), and the code aggregating it"""
+    return hashlib.sha256(f"{data_version}:{_CODE_VERSION}".encode()).hexdigest()[:16]
+
+
+class ResultStore:
+    """LRU-by-bytes result store in a SQLite file shared between processes"""
+
+    def __init__(self, path=RESULT_STORE_PATH, max_mb=RESULT_STORE_MAX_MB):
+        self.path = path
+        self.max_bytes = int(max_mb * 2**20)
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # sqlite3 connections may not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(version, query):
+        return json.dumps([version, query])
+
+    def get(self, version, query):
+        """Stored result for query under version, or None"""
+        key = self.key(version, query)
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            result = pickle.loads(row[0])
+        except Exception as e:
+            # The store only saves work; a locked file or a value this code
+            # cannot unpickle any more falls back to computing the result
+            logger.warning("Result store read failed for %s: %s", key, e)
+            return None
+        try:
+            conn.execute('UPDATE results SET last_used = ? WHERE key = ?', (time.time(), key))
+        except sqlite3.Error as e:
+            # Only the eviction order suffers; the result is still good
+            logger.warning("Result store could not mark %s as used: %s", key, e)
+        return result
+
+    def contains(self, version, query):
+        row = self._connect().execute(
+            'SELECT 1 FROM results WHERE key = ?', (self.key(version, query),)).fetchone()
+        return row is not None
+
+    def put(self, version, query, result):
+        """Store result and evict the least recently used results over the size limit"""
+        key = self.key(version, query)
+        value = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                             (key, version, value, len(value), time.time()))
+                self._evict(conn)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            logger.warning("Result store write failed for %s: %s", key, e)
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in conn.execute('SELECT key, bytes FROM results ORDER BY last_used'):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM results WHERE key = ?', evicted)
+
+    def stats(self):
+        rows, size = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM results').fetchone()
+        return {'results': rows, 'bytes': size}
+
+
+@st.cache_resource
+def get_result_store():
+    """The process's handle on the result store, or None when it is disabled"""
+    if not RESULT_STORE_PATH:
+        return None
+    return ResultStore(RESULT_STORE_PATH, RESULT_STORE_MAX_MB)
+
+
+def common_filters(states, months, days, everything=False):
+    """Filter sets users pick most: no filter, each selector alone and every state/month pair"""
+    if everything:
+        return list(itertools.product(['All'] + states, ['All'] + months, ['All'] + days))
+    combos = [('All', 'All', 'All')]
+    combos += [(state, 'All', 'All') for state in states]
+    combos += [('All', month, 'All') for month in months]
+    combos += [('All', 'All', day) for day in days]
+    combos += [(state, month, 'All') for state in states for month in months]
+    return combos
+
+
+def warm(everything=False):
+    """Compute and store every page for the common filter sets not stored yet"""
+    from aggregates import PAGE_AGGREGATES, compute_page_aggregates
+    from utils import data_version, filter_options
+
+    store = get_result_store()
+    if store is None:
+        raise SystemExit("RESULT_STORE_PATH is empty, the result store is disabled")
+    data = data_version()
+    version = dataset_version(data)
+    combos = common_filters(*filter_options(), everything=everything)
+
+    start = time.perf_counter()
+    computed = 0
+    for i, filters in enumerate(combos, 1):
+        for page in PAGE_AGGREGATES:
+            if not store.contains(version, (page, filters)):
+                compute_page_aggregates(page, filters, data)
+                computed += 1
+        if i % 25 == 0 or i == len(combos):
+            print(f"{i}/{len(combos)} filter sets, {computed} results computed "
+                  f"in {time.perf_counter() - start:.1f}s")
+    stats = store.stats()
+    print(f"Store {store.path}: {stats['results']} results, {stats['bytes'] / 2**20:.1f} MB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pre-fill the result store with the Home page's filter sets")
+    parser.add_argument('--all', action='store_true', help="every state x month x day combination")
+    warm(parser.parse_args().all)
@@ -1,27 +1,166 @@
+import hashlib
+import os
 import pandas as pd
 import streamlit as st
+from partitions import (PARTITION_ROOT, CATALOG_FILE, has_partitions, catalog_version, read_catalog, read_partitions,
+                        LazyPartitionedDataset)
+from memory import track, register_cached, low_memory_mode, deep_size, string_bytes_per_row, estimated_size
+from id_codec import pack_id_columns
 
-@st.cache_data
-def load_data():
-    """Load the cleaned data"""
-    df = pd.read_csv('data/Amazon_Sales_Cleaned.csv')
+DATA_PATH = 'data/Amazon_Sales_Cleaned.csv'
+PRICE_TIERS = ['Budget', 'Mid-range', 'Premium', 'Luxury']
+# 'lazy' keeps partitions in memory after first use, 'read' re-reads the pruned files per filter set
+PARTITION_MODE = os.environ.get('PARTITION_MODE', 'lazy')
+
+def read_cleaned_data(path=DATA_PATH):
+    """Read the cleaned CSV and restore its dtypes"""
+    df = pd.read_csv(path)
     df['date'] = pd.to_datetime(df['date'])
     # Ensure categorical columns exist
     if 'price_tier' in df.columns:
         df['price_tier'] = pd.Categorical(df['price_tier'], 
-                                         categories=['Budget', 'Mid-range', 'Premium', 'Luxury'], 
+                                         categories=PRICE_TIERS, 
                                          ordered=True)
-    return df
+    # IDs are only counted and deduplicated, so keep them as integers
+    return pack_id_columns(df)
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def data_version():
+    """Content hash of the data on disk, so re-deploying identical data keeps its version.
+
+    The catalog or CSV is only hashed again when its size or mtime changes.
+    """
+    partitioned = has_partitions(PARTITION_ROOT)
+    stat = os.stat(os.path.join(PARTITION_ROOT, CATALOG_FILE) if partitioned else DATA_PATH)
+    return _content_version(partitioned, stat.st_size, stat.st_mtime_ns)
+
+@st.cache_data(max_entries=4)
+def _content_version(partitioned, size, mtime_ns):
+    # size and mtime_ns only key the cache
+    if partitioned:
+        return f"partitions:{catalog_version(PARTITION_ROOT)}"
+    return f"csv:{file_hash(DATA_PATH)[:16]}"
+
+# The loaders below take the version only as a cache key, so a rewritten
+# file is read again and every cached frame matches the version it is under
+@st.cache_data(max_entries=1)
+def load_data(version):
+    """Load the cleaned data"""
+    return read_cleaned_data()
+
+@st.cache_resource(max_entries=1)
+def load_shared_data(version):
+    """One read-only copy of the cleaned data shared by every session"""
+    return read_cleaned_data()
 
 def apply_filters(df, state='All', month='All', day='All'):
-    """Apply filters to the dataframe"""
-    filtered_df = df.copy()
-    
-    if state != 'All':
-        filtered_df = filtered_df[filtered_df['ship_state'] == state]
-    if month != 'All':
-        filtered_df = filtered_df[filtered_df['month_name'] == month]
-    if day != 'All':
-        filtered_df = filtered_df[filtered_df['day_of_week'] == day]
+    """Apply filters to the dataframe.
+
+    All filters are combined into one mask, so only the matching rows are
+    copied, once. With no filter set df itself comes back; treat it as read-only.
+    """
+    mask = None
+    for column, value in (('ship_state', state), ('month_name', month), ('day_of_week', day)):
+        if value != 'All':
+            condition = df[column] == value
+            mask = condition if mask is None else mask & condition
     
-    return filtered_df
\ No newline at end of file
+    return df if mask is None else df[mask]
+
+
+@st.cache_resource(max_entries=1)
+def get_partitioned_dataset(version):
+    """Process-wide partitioned dataset that loads partitions on first access"""
+    dataset = LazyPartitionedDataset(PARTITION_ROOT)
+    register_cached('partitioned dataset', lambda: dataset.memory_bytes)
+    return dataset
+
+
+@st.cache_resource(max_entries=1)
+def row_string_bytes(version, _df):
+    """String bytes per row of the data under version, measured once on the first frame tracked"""
+    return string_bytes_per_row(_df)
+
+
+def track_rows(name, df, version=None):
+    """track() df, estimating its size from the version's string bytes per row instead of a deep scan"""
+    if version is None:
+        version = data_version()
+
+    def size(df):
+        return estimated_size(df, row_string_bytes(version, df)) if len(df) else deep_size(df)
+    return track(name, df, size)
+
+
+@st.cache_data(max_entries=64)
+def read_filtered_partitions(state, month, day, version):
+    """Read the pruned partitions for one filter set"""
+    return read_partitions(state, month, day, PARTITION_ROOT)
+
+
+def load_filtered(state='All', month='All', day='All', version=None):
+    """Load only the rows matching the global filters.
+
+    With a partitioned copy on disk only the month/state partitions the
+    filters can touch are read; otherwise the full CSV is filtered in memory.
+    Sessions over their memory budget filter the shared read-only copy
+    instead of their own deserialized copy of the cache. Pass the
+    data_version() a result will be stored under, so the rows come from it.
+    """
+    if version is None:
+        version = data_version()
+    if has_partitions(PARTITION_ROOT):
+        if PARTITION_MODE == 'lazy':
+            return track_rows('filtered rows', get_partitioned_dataset(version).filtered(state, month, day), version)
+        return track_rows('filtered rows', read_filtered_partitions(state, month, day, version), version)
+    if low_memory_mode():
+        df = load_shared_data(version)
+    else:
+        df = track_rows('load_data copy', load_data(version), version)
+    filtered_df = apply_filters(df, state, month, day)
+    if filtered_df is not df:
+        track_rows('filtered rows', filtered_df, version)
+    return filtered_df
+
+
+def filter_options():
+    """States, months and weekdays offered by the global filters"""
+    return _filter_options(data_version())
+
+
+@st.cache_data(max_entries=1)
+def _filter_options(version):
+    if has_partitions(PARTITION_ROOT):
+        catalog = read_catalog(PARTITION_ROOT)
+        states = sorted({entry['ship_state'] for entry in catalog['partitions']})
+        months = sorted({entry['month_name'] for entry in catalog['partitions']})
+        return states, months, catalog['days']
+    df = load_data(version)
+    return (
+        sorted(df['ship_state'].unique().tolist()),
+        sorted(df['month_name'].unique().tolist()),
+        sorted(df['day_of_week'].unique().tolist())
+    )
+
+
+def show_chart(fig, message="No data available for the selected filters"):
+    """Draw a chart, or a notice when the filters leave nothing to draw"""
+    if fig is not None:
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info(message)
+
+
+def current_filters():
+    """Return the global (state, month, day) filters of the current session"""
+    return (
+        st.session_state.selected_state,
+        st.session_state.selected_month,
+        st.session_state.selected_day
+    )